@@ -1,4 +1,52 @@
 import sqlite3
+from itertools import islice
+
+def execute_bulk(connection, query, rows, chunk_size=10000, on_chunk=None):
+    """
+    Run `query` once per parameter tuple in `rows`, through executemany
+    in chunks of `chunk_size`
+    
+    The chunks run inside a savepoint within the connection's current
+    transaction (one is begun if none is open), so a failure part way
+    undoes every chunk before it is raised, and the rest of the
+    transaction is left as it was; committing is up to the caller. `rows`
+    may be any iterable, such as a generator, and is consumed one chunk
+    at a time.
+    
+    Args:
+        connection: sqlite3 connection
+        query (str): Statement to run for each parameter tuple
+        rows: Iterable of parameter tuples
+        chunk_size (int): Parameter tuples per executemany call
+        on_chunk: Optional callable(chunk number, rows affected)
+    
+    Returns:
+        list: Rows affected by each chunk
+    """
+    if not connection.in_transaction:
+        connection.execute("BEGIN")
+    connection.execute("SAVEPOINT bulk_write")
+    cursor = connection.cursor()
+    counts = []
+    try:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            cursor.executemany(query, chunk)
+            counts.append(cursor.rowcount)
+            if on_chunk is not None:
+                on_chunk(len(counts), cursor.rowcount)
+    except BaseException:
+        connection.execute("ROLLBACK TO bulk_write")
+        connection.execute("RELEASE bulk_write")
+        raise
+    finally:
+        cursor.close()
+    connection.execute("RELEASE bulk_write")
+    return counts
+
 
 class DatabaseConnection:
     """Custom class-based context manager for database connections"""
@@ -31,12 +79,13 @@ class DatabaseConnection:
         # Return False to propagate any exceptions
         return False
 
-# Using the context manager with the 'with' statement
-with DatabaseConnection() as conn:
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
-    results = cursor.fetchall()
+if __name__ == "__main__":
+    # Using the context manager with the 'with' statement
+    with DatabaseConnection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users")
+        results = cursor.fetchall()
     
-    print("Query results:")
-    for row in results:
-        print(row)
\ No newline at end of file
+        print("Query results:")
+        for row in results:
+            print(row)
@@ -1,9 +1,55 @@
 import sqlite3
+import sys
+execute_bulk = __import__('0-databaseconnection').execute_bulk
+
+class DatabaseSession:
+    """Context manager that keeps one connection open across many queries
+
+    Pass the session to ExecuteQuery(..., session=session) and every query
+    runs on the same connection, skipping connect and close. The
+    connection's statement cache (an LRU of prepared statements keyed by
+    SQL text, `cached_statements` entries) then lets repeated queries such
+    as "SELECT * FROM users WHERE age > ?" skip parsing and planning; only
+    new parameters are bound. Changes are committed when the session
+    exits, or rolled back if it exits with an exception.
+    """
+    
+    def __init__(self, db_name='users.db', cached_statements=256):
+        """
+        Args:
+            db_name (str): Database name (default: 'users.db')
+            cached_statements (int): Prepared statements kept per connection
+        """
+        self.db_name = db_name
+        self.cached_statements = cached_statements
+        self.connection = None
+        self.queries = 0
+    
+    def __enter__(self):
+        """Open the session's connection"""
+        self.connection = sqlite3.connect(
+            self.db_name, cached_statements=self.cached_statements
+        )
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commit or roll back, then close the connection"""
+        if self.connection:
+            if exc_type is not None:
+                self.connection.rollback()
+            else:
+                self.connection.commit()
+            self.connection.close()
+            self.connection = None
+        return False
+
 
 class ExecuteQuery:
     """Reusable context manager for executing database queries"""
     
-    def __init__(self, query, parameters=None, db_name='users.db'):
+    def __init__(self, query, parameters=None, db_name='users.db',
+                 session=None, verbose=True, stream=False, chunk_size=1000,
+                 bulk=False):
         """
         Initialize the context manager with query and parameters
         
@@ -11,39 +57,109 @@ class ExecuteQuery:
             query (str): SQL query to execute
             parameters (tuple): Parameters for the query (optional)
             db_name (str): Database name (default: 'users.db')
+            session (DatabaseSession): Open session to run on instead of
+                a connection of its own (optional)
+            verbose (bool): Print progress messages (default: True)
+            stream (bool): Return a lazy row iterator instead of a list
+                (default: False)
+            chunk_size (int): Rows fetched at a time when streaming, or
+                parameter tuples per executemany call in bulk mode
+            bulk (bool): Treat `parameters` as an iterable of parameter
+                tuples and run the query once per tuple, in chunks, inside
+                a single transaction; the with block receives the rows
+                affected per chunk (default: False)
         """
         self.query = query
         self.parameters = parameters or ()
         self.db_name = db_name
+        self.session = session
+        self.verbose = verbose
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.bulk = bulk
         self.connection = None
         self.cursor = None
         self.results = None
     
+    def log(self, message):
+        if self.verbose:
+            print(message)
+    
     def __enter__(self):
         """
         Open connection, execute query, and return results
         """
-        print(f"Opening connection to {self.db_name}")
-        
-        # Open database connection
-        self.connection = sqlite3.connect(self.db_name)
+        try:
+            return self.execute()
+        except BaseException:
+            # __exit__ is not called when __enter__ fails: clean up here,
+            # rolling back anything a failed bulk write already did
+            self.__exit__(*sys.exc_info())
+            raise
+    
+    def execute(self):
+        if self.session is not None:
+            # Borrow the session's connection and its statement cache
+            self.connection = self.session.connection
+            self.session.queries += 1
+        else:
+            self.log(f"Opening connection to {self.db_name}")
+            
+            # Open database connection
+            self.connection = sqlite3.connect(self.db_name)
         self.cursor = self.connection.cursor()
         
+        if self.bulk:
+            return self.execute_bulk()
+        
         # Execute the query with parameters
-        print(f"Executing query: {self.query}")
+        self.log(f"Executing query: {self.query}")
         if self.parameters:
-            print(f"With parameters: {self.parameters}")
+            self.log(f"With parameters: {self.parameters}")
             self.cursor.execute(self.query, self.parameters)
         else:
             self.cursor.execute(self.query)
         
+        if self.stream:
+            # Rows are fetched as the caller iterates; the cursor stays
+            # open until the with block exits
+            return self.iter_rows()
+        
         # Fetch results
         self.results = self.cursor.fetchall()
-        print(f"Query executed successfully, {len(self.results)} rows returned")
+        self.log(f"Query executed successfully, {len(self.results)} rows returned")
         
         # Return the results
         return self.results
     
+    def execute_bulk(self):
+        """
+        Run the query through executemany, `chunk_size` parameter tuples
+        at a time; all chunks share the transaction committed in __exit__
+        (or the session's), and a failure rolls every chunk back
+        
+        Returns:
+            list: Rows affected by each chunk
+        """
+        self.log(f"Executing bulk query: {self.query}")
+        self.results = execute_bulk(
+            self.connection, self.query, self.parameters, self.chunk_size,
+            on_chunk=lambda number, count: self.log(
+                f"Chunk {number}: {count} rows affected")
+        )
+        return self.results
+    
+    def iter_rows(self):
+        """
+        Generator that yields the result rows, fetched `chunk_size` at a
+        time, so memory stays bounded by one chunk
+        """
+        while True:
+            rows = self.cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            yield from rows
+    
     def __exit__(self, exc_type, exc_value, traceback):
         """
         Clean up resources when exiting the context
@@ -51,31 +167,38 @@ class ExecuteQuery:
         if self.cursor:
             self.cursor.close()
         
+        if self.session is not None:
+            # The session commits or rolls back and closes the connection
+            if exc_type is not None:
+                self.log(f"Exception occurred: {exc_value}")
+            return False
+        
         if self.connection:
             if exc_type is not None:
                 # If an exception occurred, rollback any changes
-                print(f"Exception occurred: {exc_value}")
+                self.log(f"Exception occurred: {exc_value}")
                 self.connection.rollback()
             else:
                 # If no exception, commit any changes
                 self.connection.commit()
             
-            print(f"Closing connection to {self.db_name}")
+            self.log(f"Closing connection to {self.db_name}")
             self.connection.close()
         
         # Return False to propagate any exceptions
         return False
 
-# Using the ExecuteQuery context manager
-with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,)) as results:
-    print("Users older than 25:")
-    for row in results:
-        print(row)
+if __name__ == "__main__":
+    # Using the ExecuteQuery context manager
+    with ExecuteQuery("SELECT * FROM users WHERE age > ?", (25,)) as results:
+        print("Users older than 25:")
+        for row in results:
+            print(row)
 
-print("\n" + "="*50 + "\n")
+    print("\n" + "="*50 + "\n")
 
-# Another example - fetching all users
-with ExecuteQuery("SELECT * FROM users") as results:
-    print("All users:")
-    for row in results:
-        print(row)
\ No newline at end of file
+    # Another example - fetching all users
+    with ExecuteQuery("SELECT * FROM users") as results:
+        print("All users:")
+        for row in results:
+            print(row)
@@ -1,16 +1,369 @@
 import asyncio
 import aiosqlite
+import contextlib
 import time
+import weakref
+from collections import deque
 
 
-async def async_fetch_users():
+class PoolTimeoutError(asyncio.TimeoutError):
+    """Raised when no pooled connection frees up within the timeout"""
+
+
+class AsyncConnectionPool:
+    """
+    Fixed-size pool of aiosqlite connections
+    
+    At most `size` connections are opened (lazily) and reused. A task that
+    finds them all busy joins a FIFO queue; a released connection is handed
+    straight to the longest-waiting task, so waiters are served in arrival
+    order and cannot be overtaken by newcomers. A wait longer than
+    `timeout` seconds raises PoolTimeoutError.
+    """
+    
+    def __init__(self, db_name='users.db', size=5, timeout=10):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.idle = deque()
+        self.waiters = deque()
+        self.opened = 0
+        self.closed = False
+        self.acquired = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+    
+    async def acquire(self):
+        """Borrow a connection, waiting in line if all are busy"""
+        self.acquired += 1
+        if self.idle and not self.waiters:
+            return self.idle.popleft()
+        if self.opened < self.size:
+            self.opened += 1
+            try:
+                return await aiosqlite.connect(self.db_name)
+            except BaseException:
+                self.opened -= 1
+                raise
+        
+        self.waits += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            done, _ = await asyncio.wait((waiter,), timeout=self.timeout)
+        except asyncio.CancelledError:
+            self.abandon(waiter)
+            raise
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+        if not done:
+            self.abandon(waiter)
+            self.timeouts += 1
+            raise PoolTimeoutError(
+                f"No connection to {self.db_name} within {self.timeout}s"
+            )
+        return waiter.result()
+    
+    def abandon(self, waiter):
+        """Leave the queue; pass on a connection handed over meanwhile"""
+        if waiter.done() and not waiter.cancelled():
+            self.hand_over(waiter.result())
+        else:
+            waiter.cancel()
+            self.waiters.remove(waiter)
+    
+    def hand_over(self, connection):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(connection)
+                return
+        self.idle.append(connection)
+    
+    async def release(self, connection):
+        """Return a borrowed connection to the pool"""
+        try:
+            if connection.in_transaction:
+                await connection.rollback()
+        except Exception:
+            # A connection that cannot roll back is not reused: close it
+            # and free its slot, opening a replacement if a task waits
+            await self.discard(connection)
+            return
+        if self.closed:
+            await self.discard(connection)
+            return
+        self.hand_over(connection)
+    
+    async def discard(self, connection):
+        self.opened -= 1
+        try:
+            await connection.close()
+        except Exception:
+            pass
+        if self.waiters and not self.closed and self.opened < self.size:
+            self.opened += 1
+            try:
+                replacement = await aiosqlite.connect(self.db_name)
+            except Exception:
+                self.opened -= 1
+                return
+            self.hand_over(replacement)
+    
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        """Async context manager that borrows and returns a connection"""
+        connection = await self.acquire()
+        try:
+            yield connection
+        finally:
+            await self.release(connection)
+    
+    async def close(self):
+        """
+        Close the idle connections; borrowed ones are closed on release.
+        aiosqlite runs each connection on a non-daemon thread, so a pool
+        left open keeps the interpreter from exiting.
+        """
+        self.closed = True
+        while self.idle:
+            self.opened -= 1
+            await self.idle.popleft().close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+    
+    def stats(self):
+        return {
+            "size": self.size,
+            "opened": self.opened,
+            "idle": len(self.idle),
+            "waiting": len(self.waiters),
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_seconds,
+        }
+
+
+pools = weakref.WeakKeyDictionary()
+
+
+def close_with_loop(pool):
+    """
+    Close `pool` when the running event loop shuts down
+    
+    asyncio.run() finalizes pending async generators before it closes the
+    loop, so a generator left suspended here closes the pool from its
+    finally block.
+    """
+    async def guard():
+        try:
+            yield
+        finally:
+            await pool.close()
+    
+    # The loop tracks async generators weakly; the pool keeps it alive
+    pool.guard = guard()
+    asyncio.ensure_future(pool.guard.__anext__())
+
+
+def get_pool():
+    """
+    Return the shared pool of the running event loop, closed when that
+    loop shuts down
+    """
+    loop = asyncio.get_running_loop()
+    pool = pools.get(loop)
+    if pool is None:
+        pool = pools[loop] = AsyncConnectionPool()
+        close_with_loop(pool)
+    return pool
+
+
+# Priority classes, most urgent first
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a scheduled query misses its deadline"""
+
+
+class QueryScheduler:
+    """
+    Runs query coroutines with bounded concurrency and priority classes
+    
+    At most `max_concurrency` queries run at once; the rest wait in one
+    FIFO queue per priority class. A free slot always goes to a waiting
+    interactive query first, and batch queries may hold at most
+    `batch_limit` slots, so the remaining ones stay available for
+    interactive work even under a flood of batch queries. A query given a
+    `deadline` (seconds from submission) fails with DeadlineExceeded if
+    it is still queued, or still running, when the deadline passes.
+    """
+    
+    def __init__(self, max_concurrency=5, batch_limit=None, samples=1000):
+        self.max_concurrency = max_concurrency
+        if batch_limit is None:
+            batch_limit = max(1, max_concurrency - 1)
+        self.batch_limit = batch_limit
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self.metrics = {
+            priority: {
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "expired": 0,
+                "max_queue_depth": 0,
+                "wait_seconds": deque(maxlen=samples),
+            }
+            for priority in PRIORITIES
+        }
+    
+    async def run(self, query, priority=INTERACTIVE, deadline=None):
+        """
+        Run a query coroutine once a slot is free
+        
+        Args:
+            query: Coroutine to run, e.g. async_fetch_users()
+            priority (str): INTERACTIVE or BATCH
+            deadline (float): Seconds allowed from now until it completes
+        
+        Returns:
+            The coroutine's result
+        """
+        if priority not in self.queues:
+            query.close()
+            raise ValueError(f"Unknown priority: {priority!r}")
+        loop = asyncio.get_running_loop()
+        submitted = loop.time()
+        expires = None if deadline is None else submitted + deadline
+        metrics = self.metrics[priority]
+        metrics["submitted"] += 1
+        
+        turn = loop.create_future()
+        queue = self.queues[priority]
+        queue.append(turn)
+        self.dispatch()
+        metrics["max_queue_depth"] = max(metrics["max_queue_depth"], len(queue))
+        
+        if not turn.done():
+            try:
+                done, _ = await asyncio.wait(
+                    (turn,),
+                    timeout=None if expires is None else expires - loop.time()
+                )
+            except asyncio.CancelledError:
+                self.abandon(turn, priority)
+                query.close()
+                raise
+            if not done:
+                self.abandon(turn, priority)
+                query.close()
+                metrics["expired"] += 1
+                raise DeadlineExceeded(
+                    f"{priority} query expired after {deadline}s in the queue"
+                )
+        metrics["wait_seconds"].append(loop.time() - submitted)
+        
+        try:
+            if expires is None:
+                result = await query
+            else:
+                result = await asyncio.wait_for(query, expires - loop.time())
+        except asyncio.TimeoutError:
+            # Only wait_for's own timeout means the deadline passed; a
+            # timeout raised by the query itself (such as PoolTimeoutError)
+            # is a failure and propagates unchanged
+            if expires is None or loop.time() < expires:
+                metrics["failed"] += 1
+                raise
+            metrics["expired"] += 1
+            raise DeadlineExceeded(
+                f"{priority} query ran past its {deadline}s deadline"
+            ) from None
+        except Exception:
+            metrics["failed"] += 1
+            raise
+        finally:
+            self.running[priority] -= 1
+            self.dispatch()
+        metrics["completed"] += 1
+        return result
+    
+    def dispatch(self):
+        """Hand free slots to waiting queries, interactive first"""
+        while sum(self.running.values()) < self.max_concurrency:
+            for priority in PRIORITIES:
+                if priority == BATCH and self.running[BATCH] >= self.batch_limit:
+                    continue
+                queue = self.queues[priority]
+                if queue:
+                    self.running[priority] += 1
+                    queue.popleft().set_result(None)
+                    break
+            else:
+                return
+    
+    def abandon(self, turn, priority):
+        """Leave the queue; give back a slot granted meanwhile"""
+        if turn.done():
+            self.running[priority] -= 1
+            self.dispatch()
+        else:
+            turn.cancel()
+            self.queues[priority].remove(turn)
+    
+    def stats(self):
+        """
+        Return queue depth, running count and wait-time percentiles
+        (in milliseconds) per priority class
+        """
+        stats = {}
+        for priority in PRIORITIES:
+            metrics = dict(self.metrics[priority])
+            waits = sorted(metrics.pop("wait_seconds"))
+            metrics["queue_depth"] = len(self.queues[priority])
+            metrics["running"] = self.running[priority]
+            for pct in (50, 99):
+                rank = max(1, -(-len(waits) * pct // 100))
+                metrics[f"p{pct}_wait_ms"] = waits[rank - 1] * 1000 if waits else 0.0
+            stats[priority] = metrics
+        return stats
+
+
+schedulers = weakref.WeakKeyDictionary()
+
+
+def get_scheduler():
+    """
+    Return the shared scheduler of the running event loop; its concurrency
+    matches the shared pool's size
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = schedulers.get(loop)
+    if scheduler is None:
+        scheduler = schedulers[loop] = QueryScheduler(get_pool().size)
+    return scheduler
+
+
+async def async_fetch_users(pool=None):
     """
     Asynchronously fetch all users from the database
     """
     print("Starting to fetch all users...")
     start_time = time.time()
     
-    async with aiosqlite.connect('users.db') as db:
+    async with (pool or get_pool()).connection() as db:
         cursor = await db.execute("SELECT * FROM users")
         results = await cursor.fetchall()
         await cursor.close()
@@ -20,14 +373,14 @@ async def async_fetch_users():
     return results
 
 
-async def async_fetch_older_users():
+async def async_fetch_older_users(pool=None):
     """
     Asynchronously fetch users older than 40 from the database
     """
     print("Starting to fetch users older than 40...")
     start_time = time.time()
     
-    async with aiosqlite.connect('users.db') as db:
+    async with (pool or get_pool()).connection() as db:
         cursor = await db.execute("SELECT * FROM users WHERE age > ?", (40,))
         results = await cursor.fetchall()
         await cursor.close()
@@ -37,17 +390,19 @@ async def async_fetch_older_users():
     return results
 
 
-async def fetch_concurrently():
+async def fetch_concurrently(scheduler=None):
     """
-    Execute both database queries concurrently using asyncio.gather
+    Execute both database queries concurrently using asyncio.gather,
+    through the query scheduler
     """
     print("Starting concurrent database queries...")
     start_time = time.time()
+    scheduler = scheduler or get_scheduler()
     
     # Execute both queries concurrently
     all_users, older_users = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
+        scheduler.run(async_fetch_users()),
+        scheduler.run(async_fetch_older_users())
     )
     
     end_time = time.time()
@@ -67,11 +422,11 @@ async def fetch_concurrently():
     return all_users, older_users
 
 
-async def create_sample_data():
+async def create_sample_data(pool=None):
     """
     Create sample data for demonstration (optional)
     """
-    async with aiosqlite.connect('users.db') as db:
+    async with (pool or get_pool()).connection() as db:
         # Create table if it doesn't exist
         await db.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -82,4 +437,32 @@ async def create_sample_data():
             )
         ''')
         
-        # Insert sample d
\ No newline at end of file
+        # Insert sample data, once
+        cursor = await db.execute("SELECT COUNT(*) FROM users")
+        (count,) = await cursor.fetchone()
+        await cursor.close()
+        if count == 0:
+            await db.executemany(
+                "INSERT INTO users (name, age, email) VALUES (?, ?, ?)",
+                [
+                    ("Alice Johnson", 28, "alice@example.com"),
+                    ("Bob Smith", 45, "bob@example.com"),
+                    ("Carol White", 35, "carol@example.com"),
+                    ("David Brown", 52, "david@example.com"),
+                    ("Eve Davis", 23, "eve@example.com"),
+                    ("Frank Miller", 61, "frank@example.com"),
+                    ("Grace Lee", 41, "grace@example.com"),
+                ]
+            )
+        await db.commit()
+
+
+async def main():
+    async with AsyncConnectionPool() as pool:
+        pools[asyncio.get_running_loop()] = pool
+        await create_sample_data()
+        await fetch_concurrently()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
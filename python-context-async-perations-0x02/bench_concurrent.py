@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""
+Benchmark: latency and throughput of concurrent asyncio.gather queries,
+each opening its own aiosqlite connection versus borrowing from an
+AsyncConnectionPool
+
+Usage: ./bench_concurrent.py [tasks] [pool_size]
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import aiosqlite
+AsyncConnectionPool = __import__('3-concurrent').AsyncConnectionPool
+
+QUERY = "SELECT * FROM users WHERE age > ? LIMIT 20"
+
+
+def create_users(path, count=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO users (name, age, email) VALUES (?, ?, ?)",
+        ((f"User {i}", 18 + i % 80, f"user{i}@example.com")
+         for i in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+async def query(db, age):
+    cursor = await db.execute(QUERY, (age,))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return rows
+
+
+async def unpooled_task(path, age):
+    start = time.perf_counter()
+    async with aiosqlite.connect(path) as db:
+        await query(db, age)
+    return time.perf_counter() - start
+
+
+async def pooled_task(pool, age):
+    start = time.perf_counter()
+    async with pool.connection() as db:
+        await query(db, age)
+    return time.perf_counter() - start
+
+
+async def measure(make_task, tasks):
+    start = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(make_task(18 + i % 80) for i in range(tasks))
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "queries/sec": tasks / elapsed,
+        "p50 ms": percentile(latencies, 50) * 1000,
+        "p99 ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run(path, tasks, pool_size):
+    unpooled = await measure(lambda age: unpooled_task(path, age), tasks)
+    async with AsyncConnectionPool(path, size=pool_size, timeout=60) as pool:
+        pooled = await measure(lambda age: pooled_task(pool, age), tasks)
+        stats = pool.stats()
+    return unpooled, pooled, stats
+
+
+def main(tasks=1000, pool_size=8):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.db")
+        create_users(path)
+        unpooled, pooled, stats = asyncio.run(run(path, tasks, pool_size))
+
+    print(f"{tasks} concurrent tasks")
+    for name, result in (("unpooled", unpooled),
+                         (f"pool of {pool_size}", pooled)):
+        print(f"{name:>12}: " + ", ".join(
+            f"{key} {value:,.1f}" for key, value in result.items()))
+    print(f"pool: {stats['opened']} connections, {stats['waits']} waits")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Benchmark: queries/sec of a repeated parameterized ExecuteQuery, with a
+connection per query versus a DatabaseSession (with and without its
+prepared statement cache)
+
+Usage: ./bench_execute.py [queries]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+execute = __import__('1-execute')
+DatabaseSession = execute.DatabaseSession
+ExecuteQuery = execute.ExecuteQuery
+
+QUERY = "SELECT * FROM users WHERE age > ? ORDER BY age LIMIT 10"
+
+
+def create_users(path, count=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX idx_users_age ON users (age)")
+    conn.executemany(
+        "INSERT INTO users (name, age, email) VALUES (?, ?, ?)",
+        ((f"User {i}", 18 + i % 80, f"user{i}@example.com")
+         for i in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(path, queries, session=None):
+    start = time.perf_counter()
+    for i in range(queries):
+        with ExecuteQuery(QUERY, (18 + i % 80,), path, session=session,
+                          verbose=False):
+            pass
+    return queries / (time.perf_counter() - start)
+
+
+def main(queries=20000):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.db")
+        create_users(path)
+
+        fresh = run(path, queries)
+        with DatabaseSession(path, cached_statements=0) as session:
+            uncached = run(path, queries, session)
+        with DatabaseSession(path) as session:
+            cached = run(path, queries, session)
+
+    print(f"{queries} x {QUERY!r}")
+    print(f"connection per query:         {fresh:>10,.0f} queries/sec")
+    print(f"session, no statement cache:  {uncached:>10,.0f} queries/sec "
+          f"({uncached / fresh:.1f}x)")
+    print(f"session with statement cache: {cached:>10,.0f} queries/sec "
+          f"({cached / fresh:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""
+Benchmark: latency of interactive point lookups while a flood of batch
+aggregate queries runs, through a bare asyncio.gather over the pool
+versus the QueryScheduler
+
+Usage: ./bench_scheduler.py [batch_queries] [interactive_queries]
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+concurrent = __import__('3-concurrent')
+
+BATCH_QUERY = ("SELECT age, COUNT(*), AVG(LENGTH(email)) FROM users "
+               "WHERE age > ? GROUP BY age")
+INTERACTIVE_QUERY = "SELECT * FROM users WHERE id = ?"
+POOL_SIZE = 8
+
+
+def create_users(path, count=200000):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO users (name, age, email) VALUES (?, ?, ?)",
+        ((f"User {i}", 18 + i % 80, f"user{i}@example.com")
+         for i in range(count))
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+async def query(pool, sql, value):
+    async with pool.connection() as db:
+        cursor = await db.execute(sql, (value,))
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return rows
+
+
+async def timed(awaitable):
+    start = time.perf_counter()
+    await awaitable
+    return time.perf_counter() - start
+
+
+async def workload(pool, batch, interactive, scheduler=None):
+    """
+    Starts every batch query at once, then one interactive lookup every
+    2 ms; returns interactive latencies and the total time
+    """
+    def submit(sql, value, priority):
+        coroutine = query(pool, sql, value)
+        if scheduler is not None:
+            coroutine = scheduler.run(coroutine, priority)
+        return asyncio.ensure_future(timed(coroutine))
+
+    start = time.perf_counter()
+    batch_tasks = [submit(BATCH_QUERY, i % 60, concurrent.BATCH)
+                   for i in range(batch)]
+    interactive_tasks = []
+    for i in range(interactive):
+        interactive_tasks.append(
+            submit(INTERACTIVE_QUERY, i + 1, concurrent.INTERACTIVE))
+        await asyncio.sleep(0.002)
+    latencies = await asyncio.gather(*interactive_tasks)
+    await asyncio.gather(*batch_tasks)
+    return latencies, time.perf_counter() - start
+
+
+async def run(path, batch, interactive):
+    results = {}
+    async with concurrent.AsyncConnectionPool(path, size=POOL_SIZE,
+                                              timeout=600) as pool:
+        results["bare gather"] = await workload(pool, batch, interactive)
+        scheduler = concurrent.QueryScheduler(POOL_SIZE)
+        results["scheduler"] = await workload(pool, batch, interactive,
+                                              scheduler)
+    return results, scheduler.stats()
+
+
+def main(batch=100, interactive=100):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.db")
+        create_users(path)
+        results, stats = asyncio.run(run(path, batch, interactive))
+
+    print(f"{batch} batch queries + {interactive} interactive lookups, "
+          f"{POOL_SIZE} connections")
+    for name, (latencies, elapsed) in results.items():
+        print(f"{name:>12}: interactive p50 "
+              f"{percentile(latencies, 50) * 1000:8.1f} ms, p99 "
+              f"{percentile(latencies, 99) * 1000:8.1f} ms, "
+              f"total {elapsed:.2f} s")
+    for priority, metrics in stats.items():
+        print(f"{priority:>12}: max queue depth "
+              f"{metrics['max_queue_depth']}, wait p99 "
+              f"{metrics['p99_wait_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
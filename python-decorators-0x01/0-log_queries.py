@@ -1,33 +1,263 @@
 import sqlite3
 import functools
-from datetime import datetime
+import atexit
+import inspect
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import threading
+import time
 
 #### decorator to log SQL queries
 
-def log_queries(func):
-    """Decorator that logs SQL queries before executing them"""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Extract the query from function arguments
-        # Assuming the first argument or 'query' keyword argument contains the SQL
-        query = None
-        
-        # Check if query is passed as positional argument
-        if args:
-            query = args[0]
-        # Check if query is passed as keyword argument
-        elif 'query' in kwargs:
-            query = kwargs['query']
-        
-        # Log the query with timestamp
-        if query:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{timestamp}] Executing SQL Query: {query}")
-        
-        # Execute the original function
-        return func(*args, **kwargs)
-    
-    return wrapper
+logger = logging.getLogger("queries")
+logger.propagate = False
+
+# Literals are replaced so that queries differing only in values share a fingerprint
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class LatencyHistogram:
+    """Latency histogram with power-of-two microsecond buckets"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.buckets = [0] * 40
+
+    def add(self, seconds, rows, failed=False):
+        self.count += 1
+        if failed:
+            self.errors += 1
+        self.total += seconds
+        self.rows += rows
+        if seconds > self.max:
+            self.max = seconds
+        micros = int(seconds * 1e6)
+        self.buckets[min(micros.bit_length(), len(self.buckets) - 1)] += 1
+
+    def percentile(self, pct):
+        """Returns the upper bound of the bucket holding the percentile, in seconds"""
+        rank = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min((1 << index) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "rows": self.rows,
+            "errors": self.errors,
+            "mean_ms": self.total / self.count * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+histograms = {}
+histograms_lock = threading.Lock()
+listener = None
+listener_lock = threading.Lock()
+
+
+def start_logging(handler=None):
+    """Starts the background listener that writes query records
+
+    Records are put on an in-memory queue by the calling thread and
+    formatted and written by the listener thread, so a logged query never
+    waits on I/O.
+    """
+    global listener
+    with listener_lock:
+        if listener is not None:
+            return listener
+        if handler is None:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter(
+                "[%(asctime)s] Executing SQL Query: %(message)s",
+                "%Y-%m-%d %H:%M:%S"
+            ))
+        records = queue.SimpleQueue()
+        logger.addHandler(DeferredQueueHandler(records))
+        logger.setLevel(logging.INFO)
+        listener = logging.handlers.QueueListener(records, handler)
+        listener.start()
+        atexit.register(stop_logging)
+        return listener
+
+
+def stop_logging():
+    """Flushes pending records and stops the listener"""
+    global listener
+    with listener_lock:
+        if listener is not None:
+            listener.stop()
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            listener = None
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Normalizes a query: literals become ?, IN lists collapse, whitespace and case fold"""
+    normalized = LITERAL_PATTERN.sub("?", query)
+    normalized = IN_LIST_PATTERN.sub("(?+)", normalized)
+    return " ".join(normalized.split()).lower()
+
+
+def query_stats(slowest=None):
+    """Returns latency summaries per fingerprint, slowest (by p99) first"""
+    with histograms_lock:
+        stats = {key: histogram.summary() for key, histogram in histograms.items()}
+    ordered = sorted(stats.items(), key=lambda item: item[1]["p99_ms"], reverse=True)
+    return dict(ordered[:slowest] if slowest else ordered)
+
+
+def reset_query_stats():
+    with histograms_lock:
+        histograms.clear()
+
+
+def find_query(args, kwargs):
+    """
+    Returns (query, positional params) from the decorated call's arguments,
+    or (None, ()) when no SQL string is found
+    """
+    # The SQL is the first argument, or the second one when a connection
+    # comes first (stacked under with_db_connection), or the 'query' keyword
+    for index in (0, 1):
+        if len(args) > index and isinstance(args[index], str):
+            return args[index], args[index + 1:]
+    query = kwargs.get('query')
+    if isinstance(query, str):
+        return query, ()
+    return None, ()
+
+
+def record(query, params, kwargs, elapsed, result, caller, sample_rate, slow_ms,
+           error=None):
+    """
+    Adds a timed call to its histogram and logs it if sampled or slow;
+    a call that raised `error` is always logged, at ERROR level
+    """
+    try:
+        rows = len(result)
+    except TypeError:
+        rows = 0
+    key = fingerprint(query)
+    with histograms_lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = LatencyHistogram()
+        histogram.add(elapsed, rows, failed=error is not None)
+
+    slow = slow_ms is not None and elapsed * 1000 >= slow_ms
+    if (error is not None or slow or sample_rate >= 1.0
+            or random.random() < sample_rate):
+        if listener is None:
+            start_logging()
+        if error is not None:
+            level, status = logging.ERROR, f"{type(error).__name__}: {error}"
+        else:
+            level, status = logging.WARNING if slow else logging.INFO, "ok"
+        logger.log(
+            level,
+            "%s params=%r kwargs=%r %.3fms rows=%d status=%s fingerprint=%s "
+            "caller=%s:%d",
+            query, params, {k: v for k, v in kwargs.items() if k != 'query'},
+            elapsed * 1000, rows, status, key,
+            caller.f_code.co_filename, caller.f_lineno
+        )
+
+
+def record_quietly(*args):
+    """Calls record(), reporting its failures instead of raising them"""
+    try:
+        record(*args)
+    except Exception:
+        logger.exception("Could not record query statistics")
+
+
+def log_queries(func=None, *, sample_rate=1.0, slow_ms=None):
+    """Decorator that logs and times SQL queries
+
+    Every call is timed into a latency histogram for its query fingerprint
+    (see query_stats). A `sample_rate` fraction of calls, plus every call
+    slower than `slow_ms`, is logged with its query, parameters, wall
+    time, rows returned and caller. Calls that raise are counted as
+    errors and always logged with their exception. Coroutine functions
+    are awaited and timed the same way. Usable bare or as
+    log_queries(sample_rate=..., slow_ms=...).
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                query, params = find_query(args, kwargs)
+                if not query:
+                    return await func(*args, **kwargs)
+
+                caller = sys._getframe(1)
+                result = error = None
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                except BaseException as exc:
+                    error = exc
+                    raise
+                finally:
+                    record_quietly(query, params, kwargs,
+                                   time.perf_counter() - start, result,
+                                   caller, sample_rate, slow_ms, error)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Extract the query from function arguments
+            query, params = find_query(args, kwargs)
+            if not query:
+                return func(*args, **kwargs)
+
+            # Execute the original function, timing it; failed calls are
+            # recorded too
+            result = error = None
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                record_quietly(query, params, kwargs,
+                               time.perf_counter() - start, result,
+                               sys._getframe(1), sample_rate, slow_ms, error)
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @log_queries
 def fetch_all_users(query):
@@ -39,4 +269,6 @@ def fetch_all_users(query):
     return results
 
 #### fetch users while logging the query
-users = fetch_all_users(query="SELECT * FROM users")
\ No newline at end of file
+if __name__ == "__main__":
+    users = fetch_all_users(query="SELECT * FROM users")
+    print(query_stats())
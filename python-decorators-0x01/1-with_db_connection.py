@@ -1,22 +1,49 @@
-import sqlite3 
 import functools
+import inspect
+db_pool = __import__('db_pool')
 
-def with_db_connection(func):
-    """Decorator that automatically handles database connections"""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Open database connection
-        conn = sqlite3.connect('users.db')
+def with_db_connection(func=None, *, provider=None):
+    """Decorator that automatically handles database connections
+
+    Connections come from `provider` (anything with acquire() and
+    release(conn), see db_pool); by default the shared thread-local pool,
+    so repeated calls reuse one open connection per thread. Coroutine
+    functions get aiosqlite connections from the event loop's AsyncPool
+    (or an async `provider`) instead. Usable bare or as
+    with_db_connection(provider=...).
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                source = provider or db_pool.get_async_pool()
+                conn = await source.acquire()
+                try:
+                    return await func(conn, *args, **kwargs)
+                finally:
+                    await source.release(conn)
+            
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            source = provider or db_pool.get_pool()
+            # Borrow a database connection
+            conn = source.acquire()
+            
+            try:
+                # Call the original function with connection as first argument
+                result = func(conn, *args, **kwargs)
+                return result
+            finally:
+                # Always hand the connection back, even if an exception occurs
+                source.release(conn)
         
-        try:
-            # Call the original function with connection as first argument
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close the connection, even if an exception occurs
-            conn.close()
+        return wrapper
     
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @with_db_connection 
 def get_user_by_id(conn, user_id): 
@@ -25,5 +52,6 @@ def get_user_by_id(conn, user_id):
     return cursor.fetchone() 
 
 #### Fetch user by ID with automatic connection handling 
-user = get_user_by_id(user_id=1)
-print(user)
\ No newline at end of file
+if __name__ == "__main__":
+    user = get_user_by_id(user_id=1)
+    print(user)
@@ -1,5 +1,12 @@
 import sqlite3 
 import functools
+import asyncio
+import concurrent.futures
+import inspect
+import queue
+import threading
+import time
+invalidation = __import__('invalidation')
 
 def with_db_connection(func):
     """Decorator that automatically handles database connections"""
@@ -18,29 +25,194 @@ def with_db_connection(func):
     
     return wrapper
 
-def transactional(func):
-    """Decorator that manages database transactions"""
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
+class GroupCommitter:
+    """Coalesces transactional calls into shared SQLite transactions
+
+    A worker thread owns one connection. Submitted calls queue up while
+    the previous transaction commits, and the worker then runs up to
+    `max_batch` of them (waiting at most `max_wait` seconds for more) in
+    a single BEGIN ... COMMIT, so many updates share one fsync. Each call
+    runs inside its own SAVEPOINT: a failing call is rolled back to its
+    savepoint and gets its exception, while the others still commit.
+    """
+
+    def __init__(self, database='users.db', max_batch=256, max_wait=0.0):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.jobs = queue.SimpleQueue()
+        self.batches = 0
+        self.committed = 0
+        self.failed = 0
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, func, args=(), kwargs=None):
+        """Queues func(conn, *args, **kwargs); returns a Future for its result"""
+        future = concurrent.futures.Future()
+        self.jobs.put((future, func, args, kwargs or {}))
+        return future
+
+    def close(self):
+        """Commits whatever is queued and stops the worker"""
+        self.jobs.put(None)
+        self.worker.join()
+
+    def collect(self):
+        """Blocks for the next job, then gathers a batch of queued jobs"""
+        batch = [self.jobs.get()]
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    batch.append(self.jobs.get(timeout=remaining))
+                else:
+                    batch.append(self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        # Autocommit mode: the worker issues BEGIN and COMMIT itself
+        conn = sqlite3.connect(self.database, isolation_level=None)
         try:
-            # Start transaction (SQLite is in autocommit mode by default)
-            # Begin transaction by executing a statement
-            conn.execute("BEGIN")
+            while True:
+                batch = self.collect()
+                stop = batch[-1] is None
+                if stop:
+                    batch.pop()
+                if batch:
+                    self.commit_batch(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def commit_batch(self, conn, batch):
+        outcomes = []
+        try:
+            with invalidation.track_writes(conn) as written:
+                conn.execute("BEGIN IMMEDIATE")
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT job")
+                    try:
+                        result = func(conn, *args, **kwargs)
+                    except Exception as e:
+                        # Undo only this call's changes
+                        conn.execute("ROLLBACK TO job")
+                        conn.execute("RELEASE job")
+                        future.set_exception(e)
+                        self.failed += 1
+                    else:
+                        conn.execute("RELEASE job")
+                        outcomes.append((future, result))
+                conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN or COMMIT failed: nothing in the batch was committed
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, result in outcomes:
+                future.set_exception(e)
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # Drop cached results that read the tables we just changed
+        invalidation.invalidate(written)
+        self.batches += 1
+        self.committed += len(outcomes)
+        for future, result in outcomes:
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "committed": self.committed,
+            "failed": self.failed,
+        }
+
+
+def transactional(func=None, *, group=None, async_result=False):
+    """Decorator that manages database transactions
+
+    With group=GroupCommitter(...) calls are coalesced into shared
+    transactions: the decorated function is then called without a
+    connection (the committer supplies its own), blocks until its batch
+    commits, and wrapper.submit(...) returns a Future instead of blocking.
+    
+    Coroutine functions get an async wrapper for aiosqlite connections.
+    In group mode the function itself must be synchronous (it runs on the
+    committer's thread), but can be decorated with async_result=True so
+    callers await the batch commit instead of blocking the event loop.
+    """
+    def decorator(func):
+        if group is not None:
+            if inspect.iscoroutinefunction(func):
+                raise TypeError("Group commit needs a synchronous function")
             
-            # Execute the original function
-            result = func(conn, *args, **kwargs)
+            @functools.wraps(func)
+            def grouped(*args, **kwargs):
+                return group.submit(func, args, kwargs).result()
             
-            # If successful, commit the transaction
-            conn.commit()
-            return result
+            @functools.wraps(func)
+            async def async_grouped(*args, **kwargs):
+                return await asyncio.wrap_future(group.submit(func, args, kwargs))
             
-        except Exception as e:
-            # If an error occurs, rollback the transaction
-            conn.rollback()
-            # Re-raise the exception to preserve the original error
-            raise e
+            wrapper = async_grouped if async_result else grouped
+            wrapper.submit = lambda *args, **kwargs: group.submit(func, args, kwargs)
+            return wrapper
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(conn, *args, **kwargs):
+                try:
+                    async with invalidation.track_writes_async(conn) as written:
+                        await conn.execute("BEGIN")
+                        result = await func(conn, *args, **kwargs)
+                        await conn.commit()
+                    
+                    invalidation.invalidate(written)
+                    return result
+                    
+                except Exception as e:
+                    await conn.rollback()
+                    raise e
+            
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            try:
+                # Start transaction (SQLite is in autocommit mode by default)
+                # Begin transaction by executing a statement
+                with invalidation.track_writes(conn) as written:
+                    conn.execute("BEGIN")
+                    
+                    # Execute the original function
+                    result = func(conn, *args, **kwargs)
+                    
+                    # If successful, commit the transaction
+                    conn.commit()
+                
+                # Drop cached results that read the tables we just changed
+                invalidation.invalidate(written)
+                return result
+                
+            except Exception as e:
+                # If an error occurs, rollback the transaction
+                conn.rollback()
+                # Re-raise the exception to preserve the original error
+                raise e
+        
+        return wrapper
     
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @with_db_connection 
 @transactional 
@@ -49,4 +221,5 @@ def update_user_email(conn, user_id, new_email):
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id)) 
 
 #### Update user's email with automatic transaction handling 
-update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
\ No newline at end of file
+if __name__ == "__main__":
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
@@ -1,6 +1,11 @@
 import time
 import sqlite3 
 import functools
+import asyncio
+import inspect
+import logging
+import random
+import threading
 
 def with_db_connection(func):
     """Decorator that automatically handles database connections"""
@@ -19,34 +24,240 @@ def with_db_connection(func):
     
     return wrapper
 
-def retry_on_failure(retries=3, delay=2):
-    """Decorator that retries a function on failure"""
+logger = logging.getLogger("retries")
+
+
+def is_transient(error):
+    """True for SQLite errors that clear up on their own (locked or busy database)"""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def is_unavailable(error):
+    """True for SQLite errors meaning the database cannot be reached at all"""
+    message = str(error).lower()
+    return "unable to open" in message or "disk i/o" in message
+
+
+# Exception type -> predicate deciding whether that error is worth retrying
+DEFAULT_RETRY_ON = {sqlite3.OperationalError: is_transient}
+
+# Exception type -> predicate deciding whether that error says the database
+# is unhealthy, and so counts against the circuit breaker
+DEFAULT_BREAKER_ON = {
+    sqlite3.OperationalError: is_unavailable,
+    OSError: lambda error: True,
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the function while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fails fast once the database keeps failing
+
+    After `failure_threshold` consecutive calls fail because the database
+    is unavailable the circuit opens and calls fail immediately with
+    CircuitOpenError. Lock contention is not an outage and never opens it. Once
+    `reset_timeout` seconds have passed a single trial call is let
+    through (half-open); its success closes the circuit again, and its
+    failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Returns "trial" for the half-open trial call, True if a call may
+        go ahead, False if it must fail fast"""
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return "trial"
+            return False
+
+    def abandon_trial(self):
+        """Lets another trial through after one ended without an outcome
+        (e.g. it was cancelled)"""
+        with self.lock:
+            self.trial_running = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class RetryMetrics:
+    """Counters for one decorated function"""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.sleep_seconds = 0.0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+# Breaker shared by every decorated function that does not bring its own
+database_breaker = CircuitBreaker()
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30, retry_on=None,
+                     breaker=database_breaker, breaker_on=None):
+    """Decorator that retries a function on transient failures
+
+    Waits follow exponential backoff with full jitter: before retry n the
+    delay is uniform in [0, min(max_delay, delay * 2 ** n)], so competing
+    callers spread out instead of retrying in lockstep. Only errors
+    accepted by `retry_on` (exception type -> predicate) are retried.
+    The circuit `breaker` (None to disable) is consulted once per call,
+    and a call that ends in an error accepted by `breaker_on` (the
+    database is unreachable) counts once against it, however many
+    attempts it made; any other outcome means the database answered.
+    Coroutine functions get an async wrapper that awaits asyncio.sleep.
+    Counters are available as wrapper.metrics.
+    """
+    retry_on = DEFAULT_RETRY_ON if retry_on is None else retry_on
+    breaker_on = DEFAULT_BREAKER_ON if breaker_on is None else breaker_on
+
+    def matches(error, predicates):
+        for error_type, predicate in predicates.items():
+            if isinstance(error, error_type):
+                return predicate(error)
+        return False
+
+    def backoff(attempt):
+        return random.uniform(0, min(max_delay, delay * 2 ** attempt))
+
     def decorator(func):
+        metrics = RetryMetrics()
+
+        def before_call():
+            """Returns True if this call is the breaker's trial call"""
+            allowed = True if breaker is None else breaker.allow()
+            if not allowed:
+                metrics.rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit open, not calling {func.__name__}"
+                )
+            return allowed == "trial"
+
+        def after_interrupt(trial):
+            # Cancelled (or otherwise interrupted) without an outcome
+            if trial:
+                breaker.abandon_trial()
+
+        def record_outcome(error=None):
+            if breaker is None:
+                return
+            if error is not None and matches(error, breaker_on):
+                # The database is down: count it against the circuit
+                breaker.record_failure()
+            else:
+                # The database answered; the error is not its health
+                breaker.record_success()
+
+        def after_failure(error, attempt):
+            """Returns the seconds to wait, or re-raises the error"""
+            retryable = matches(error, retry_on)
+            if not retryable or attempt == retries:
+                if retryable:
+                    logger.error("Function %s failed after %d attempts: %s",
+                                 func.__name__, retries + 1, error)
+                metrics.failures += 1
+                record_outcome(error)
+                raise error
+            wait = backoff(attempt)
+            metrics.retries += 1
+            metrics.sleep_seconds += wait
+            logger.warning("Attempt %d failed for %s: %s; retrying in %.3fs",
+                           attempt + 1, func.__name__, error, wait)
+            return wait
+
+        def after_success():
+            record_outcome()
+            metrics.successes += 1
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                metrics.calls += 1
+                trial = before_call()
+                try:
+                    for attempt in range(retries + 1):  # retries + 1 to include the initial attempt
+                        metrics.attempts += 1
+                        try:
+                            result = await func(*args, **kwargs)
+                        except Exception as e:
+                            wait = after_failure(e, attempt)
+                        else:
+                            after_success()
+                            return result
+                        await asyncio.sleep(wait)
+                except Exception:
+                    # Already recorded by after_failure
+                    raise
+                except BaseException:
+                    after_interrupt(trial)
+                    raise
+
+            async_wrapper.metrics = metrics
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
-            
-            for attempt in range(retries + 1):  # retries + 1 to include the initial attempt
-                try:
-                    # Attempt to execute the function
-                    return func(*args, **kwargs)
-                    
-                except Exception as e:
-                    last_exception = e
-                    
-                    # If this was the last attempt, re-raise the exception
-                    if attempt == retries:
-                        print(f"Function {func.__name__} failed after {retries + 1} attempts")
-                        raise last_exception
-                    
-                    # Otherwise, log the failure and wait before retrying
-                    print(f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}")
-                    print(f"Retrying in {delay} seconds...")
-                    time.sleep(delay)
-            
-            # This should never be reached, but included for safety
-            raise last_exception
-        
+            metrics.calls += 1
+            trial = before_call()
+            try:
+                for attempt in range(retries + 1):  # retries + 1 to include the initial attempt
+                    metrics.attempts += 1
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as e:
+                        wait = after_failure(e, attempt)
+                    else:
+                        after_success()
+                        return result
+                    time.sleep(wait)
+            except Exception:
+                # Already recorded by after_failure
+                raise
+            except BaseException:
+                after_interrupt(trial)
+                raise
+
+        wrapper.metrics = metrics
         return wrapper
     return decorator
 
@@ -58,5 +269,7 @@ def fetch_users_with_retry(conn):
     return cursor.fetchall()
 
 #### attempt to fetch users with automatic retry on failure
-users = fetch_users_with_retry()
-print(users)
\ No newline at end of file
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    users = fetch_users_with_retry()
+    print(users)
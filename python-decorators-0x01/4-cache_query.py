@@ -1,6 +1,12 @@
+import sys
 import time
 import sqlite3 
 import functools
+import asyncio
+import inspect
+import threading
+from collections import OrderedDict
+invalidation = __import__('invalidation')
 
 def with_db_connection(func):
     """Decorator that automatically handles database connections"""
@@ -19,45 +25,218 @@ def with_db_connection(func):
     
     return wrapper
 
-query_cache = {}
+class QueryCache:
+    """Bounded LRU cache of query results with per-entry TTL
 
-def cache_query(func):
-    """Decorator that caches query results based on SQL query string"""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Extract the query from function arguments
-        query = None
-        
-        # Check if query is passed as positional argument (after conn)
-        if len(args) > 1:
-            query = args[1]  # First arg is conn, second is typically query
-        # Check if query is passed as keyword argument
-        elif 'query' in kwargs:
-            query = kwargs['query']
+    Entries are evicted least recently used first once the cache holds
+    more than `max_entries` results or more than `max_bytes` (estimated).
+    Each entry remembers the generations of the tables its query read, so
+    a write committed through `transactional` makes it stale.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=16 * 1024 * 1024,
+                 ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    def get(self, key, tables):
+        """Returns (True, result) on a fresh hit, else (False, None)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                result, size, expires, generation = entry
+                if time.monotonic() >= expires:
+                    self.expirations += 1
+                    self.remove(key)
+                elif generation != invalidation.generation(tables):
+                    self.invalidations += 1
+                    self.remove(key)
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, result
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result, generation, ttl=None):
+        """Stores a result read at `generation` of its tables"""
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (result, size, expires, generation)
+            self.bytes += size
+            while (len(self.entries) > self.max_entries
+                   or self.bytes > self.max_bytes):
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key):
+        self.bytes -= self.entries.pop(key)[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Returns a dictionary of cache counters"""
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "coalesced": self.coalesced,
+        }
+
+
+def estimate_size(value):
+    """Estimates the memory held by a query result, in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+query_cache = QueryCache()
+
+def make_key(args, kwargs):
+    """Returns (cache key, tables read) for a call, or None if it cannot be cached"""
+    # Extract the query from function arguments
+    query = None
+    params = args[2:]
+    
+    # Check if query is passed as positional argument (after conn)
+    if len(args) > 1:
+        query = args[1]  # First arg is conn, second is typically query
+    # Check if query is passed as keyword argument
+    elif 'query' in kwargs:
+        query = kwargs['query']
+        params = args[1:]
+    
+    if not query:
+        return None
+    
+    # Whitespace is normalized, case is not: literals are case sensitive
+    cache_key = (
+        " ".join(query.split()),
+        params,
+        tuple(sorted((k, v) for k, v in kwargs.items() if k != 'query')),
+    )
+    try:
+        hash(cache_key)
+    except TypeError:
+        # Unhashable parameters (e.g. lists) cannot be cached
+        return None
+    return cache_key, invalidation.tables_read(query)
+
+
+def cache_query(func=None, *, cache=None, ttl=None):
+    """Decorator that caches query results based on the SQL query and its parameters
+
+    The key is the whitespace-normalized query plus every other argument
+    after conn, so the same query with different parameters is cached
+    separately. Results are dropped when they expire, when the cache
+    needs room, or when `transactional` commits a write to a table the
+    query reads. Usable bare or as cache_query(cache=..., ttl=...).
+    
+    Coroutine functions get an async wrapper with single-flight misses:
+    while one task runs a query, other tasks asking for the same key
+    await its result instead of running the query again.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            in_flight = {}
+            
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                store = cache or query_cache
+                key = make_key(args, kwargs)
+                # If no query found, execute without caching
+                if key is None:
+                    return await func(*args, **kwargs)
+                cache_key, tables = key
+                
+                while True:
+                    found, result = store.get(cache_key, tables)
+                    if found:
+                        return result
+                    
+                    pending = in_flight.get(cache_key)
+                    if pending is None or pending.get_loop() is not asyncio.get_running_loop():
+                        break
+                    store.coalesced += 1
+                    try:
+                        # Shielded so a cancelled waiter leaves the query running
+                        return await asyncio.shield(pending)
+                    except asyncio.CancelledError:
+                        if not pending.cancelled():
+                            raise
+                        # The task running the query was cancelled; try again
+                
+                pending = asyncio.get_running_loop().create_future()
+                in_flight[cache_key] = pending
+                generation = invalidation.generation(tables)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    pending.set_exception(e)
+                    # Mark the exception retrieved in case nobody was waiting
+                    pending.exception()
+                    raise
+                except BaseException:
+                    pending.cancel()
+                    raise
+                finally:
+                    in_flight.pop(cache_key, None)
+                store.put(cache_key, result, generation, ttl)
+                pending.set_result(result)
+                return result
+            
+            return async_wrapper
         
-        # If we found a query, check cache
-        if query:
-            # Use the query string as cache key
-            cache_key = query.strip().lower()  # Normalize the query for consistent caching
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = cache or query_cache
+            key = make_key(args, kwargs)
+            # If no query found, execute without caching
+            if key is None:
+                return func(*args, **kwargs)
+            cache_key, tables = key
             
-            # Check if result is already cached
-            if cache_key in query_cache:
-                print(f"Cache hit for query: {query}")
-                return query_cache[cache_key]
+            found, result = store.get(cache_key, tables)
+            if found:
+                return result
             
-            # Execute the function if not cached
-            print(f"Cache miss for query: {query}")
+            # Snapshot the table generations before reading, so a write
+            # that commits while the query runs leaves the entry stale
+            generation = invalidation.generation(tables)
             result = func(*args, **kwargs)
-            
-            # Store result in cache
-            query_cache[cache_key] = result
-            print(f"Result cached for query: {query}")
+            store.put(cache_key, result, generation, ttl)
             return result
         
-        # If no query found, execute without caching
-        return func(*args, **kwargs)
+        return wrapper
     
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 @with_db_connection
 @cache_query
@@ -66,8 +245,10 @@ def fetch_users_with_cache(conn, query):
     cursor.execute(query)
     return cursor.fetchall()
 
-#### First call will cache the result
-users = fetch_users_with_cache(query="SELECT * FROM users")
+if __name__ == "__main__":
+    #### First call will cache the result
+    users = fetch_users_with_cache(query="SELECT * FROM users")
 
-#### Second call will use the cached result
-users_again = fetch_users_with_cache(query="SELECT * FROM users")
\ No newline at end of file
+    #### Second call will use the cached result
+    users_again = fetch_users_with_cache(query="SELECT * FROM users")
+    print(query_cache.stats())
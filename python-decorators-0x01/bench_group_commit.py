@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""
+Benchmark: single-row update throughput of transactional with one commit
+per call versus group commit (concurrent callers and pipelined submits)
+
+Usage: ./bench_group_commit.py [updates] [threads]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+transactional_module = __import__('2-transactional')
+transactional = transactional_module.transactional
+GroupCommitter = transactional_module.GroupCommitter
+
+
+def update_user_email(conn, user_id, new_email):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?",
+                   (new_email, user_id))
+
+
+def create_users(path, count=1000):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO users (id, name, email) VALUES (?, ?, ?)",
+        ((i, f"User {i}", f"user{i}@example.com") for i in range(1, count + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_call(path, updates):
+    """One transaction (and fsync) per update, on a persistent connection"""
+    update = transactional(update_user_email)
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    for i in range(updates):
+        update(conn, i % 1000 + 1, f"new{i}@example.com")
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return updates / elapsed
+
+
+def grouped_threads(path, updates, threads):
+    """Blocking calls from `threads` concurrent callers"""
+    group = GroupCommitter(path)
+    update = transactional(update_user_email, group=group)
+    per_thread = updates // threads
+
+    def work(offset):
+        for i in range(per_thread):
+            update((offset + i) % 1000 + 1, f"new{i}@example.com")
+
+    workers = [threading.Thread(target=work, args=(n * per_thread,))
+               for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    group.close()
+    return per_thread * threads / elapsed, group.stats()
+
+
+def grouped_pipelined(path, updates):
+    """Back-to-back submits from one caller, waiting only at the end"""
+    group = GroupCommitter(path)
+    update = transactional(update_user_email, group=group)
+    start = time.perf_counter()
+    futures = [update.submit(i % 1000 + 1, f"new{i}@example.com")
+               for i in range(updates)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    group.close()
+    return updates / elapsed, group.stats()
+
+
+def main(updates=5000, threads=32):
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        path = os.path.join(directory, "users.db")
+        create_users(path)
+
+        baseline = per_call(path, updates)
+        threaded, threaded_stats = grouped_threads(path, updates, threads)
+        pipelined, pipelined_stats = grouped_pipelined(path, updates)
+
+    print(f"{updates} single-row updates")
+    print(f"commit per call:            {baseline:>10,.0f} updates/sec")
+    print(f"group commit, {threads:>3} threads:  {threaded:>10,.0f} updates/sec "
+          f"({threaded / baseline:.1f}x, {threaded_stats['batches']} commits)")
+    print(f"group commit, pipelined:    {pipelined:>10,.0f} updates/sec "
+          f"({pipelined / baseline:.1f}x, {pipelined_stats['batches']} commits)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark: calls/sec of a with_db_connection lookup when every call
+opens its own connection versus reusing the thread-local pool
+
+Usage: ./bench_with_db_connection.py [calls] [threads]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+db_pool = __import__('db_pool')
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+
+
+def create_users(path, count=1000):
+    """Creates a users table with `count` rows"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO users (id, name, email) VALUES (?, ?, ?)",
+        ((i, f"User {i}", f"user{i}@example.com") for i in range(1, count + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(provider, calls, threads):
+    """
+    Returns calls/sec of get_user_by_id spread over `threads` threads
+    """
+    @with_db_connection(provider=provider)
+    def get_user_by_id(conn, user_id):
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+        return cursor.fetchone()
+
+    per_thread = calls // threads
+
+    def work():
+        for i in range(per_thread):
+            get_user_by_id(i % 1000 + 1)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main(calls=20000, threads=1):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.db")
+        create_users(path)
+
+        fresh = measure(db_pool.FreshConnections(path), calls, threads)
+        pool = db_pool.ThreadLocalPool(path, max_size=threads)
+        pooled = measure(pool, calls, threads)
+        pool.close_all()
+
+    print(f"{calls} calls on {threads} thread(s)")
+    print(f"connection per call: {fresh:>12,.0f} calls/sec")
+    print(f"thread-local pool:   {pooled:>12,.0f} calls/sec "
+          f"({pooled / fresh:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
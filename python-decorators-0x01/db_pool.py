@@ -0,0 +1,326 @@
+#!/usr/bin/python3
+"""
+Connection providers for the database decorators
+
+A provider hands out sqlite3 connections through acquire() and takes them
+back through release(). ThreadLocalPool keeps one persistent connection
+per thread, so a decorated function called in a loop pays for
+sqlite3.connect (and re-preparing its statements) only once per thread.
+FreshConnections opens and closes a connection per call, which is what
+with_db_connection used to do. AsyncPool is the asyncio counterpart, a
+bounded set of aiosqlite connections shared by the tasks of one loop.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+# Database used when no path is given
+DATABASE = 'users.db'
+
+
+class PoolExhaustedError(sqlite3.OperationalError):
+    """Raised when no connection slot frees up before the timeout"""
+
+
+class FreshConnections:
+    """Provider that opens a new connection for every call"""
+
+    def __init__(self, database=DATABASE, **connect_kwargs):
+        self.database = database
+        self.connect_kwargs = connect_kwargs
+
+    def acquire(self):
+        return sqlite3.connect(self.database, **self.connect_kwargs)
+
+    def release(self, conn):
+        conn.close()
+
+
+class ThreadLocalPool:
+    """
+    Provider that keeps one persistent connection per thread
+
+    Args:
+        database (str): SQLite database path
+        max_size (int): Most connections open at once (None for no limit);
+            a new thread waits for a slot, and slots held by threads that
+            have exited are reclaimed
+        cached_statements (int): Size of each connection's prepared
+            statement cache
+        timeout (float): Seconds a new thread waits for a free slot
+        **connect_kwargs: Passed on to sqlite3.connect
+    """
+
+    def __init__(self, database=DATABASE, max_size=None,
+                 cached_statements=128, timeout=30, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self.connections = {}
+        # Thread ident -> number of decorated calls currently borrowing
+        self.depths = {}
+        self.condition = threading.Condition()
+        self.pid = os.getpid()
+        self.created = 0
+        self.reused = 0
+
+    def connect(self):
+        return sqlite3.connect(
+            self.database,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+            **self.connect_kwargs
+        )
+
+    def acquire(self):
+        """
+        Returns the calling thread's connection, opening it on first use;
+        nested calls on one thread share it
+        """
+        if self.pid != os.getpid():
+            # Connections must not cross a fork; start over in the child
+            self.connections = {}
+            self.depths = {}
+            self.condition = threading.Condition()
+            self.pid = os.getpid()
+
+        ident = threading.get_ident()
+        conn = self.connections.get(ident)
+        if conn is not None:
+            self.depths[ident] = self.depths.get(ident, 0) + 1
+            self.reused += 1
+            return conn
+
+        with self.condition:
+            # Reclaim connections of exited threads, bounded pool or not
+            self.prune_dead_threads()
+            deadline = time.monotonic() + self.timeout
+            while (self.max_size is not None
+                   and len(self.connections) >= self.max_size):
+                if self.prune_dead_threads():
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"All {self.max_size} connections are in use"
+                    )
+                # Wake up periodically to reclaim slots of exited threads
+                self.condition.wait(min(remaining, 0.1))
+            conn = self.connect()
+            self.connections[ident] = conn
+            self.depths[ident] = 1
+            self.created += 1
+        return conn
+
+    def release(self, conn):
+        """
+        Keeps the connection open for the next call on this thread; when
+        the outermost borrow ends, work left uncommitted is rolled back,
+        as closing the connection would. An inner (nested) release leaves
+        the outer call's transaction alone.
+        """
+        ident = threading.get_ident()
+        depth = self.depths.get(ident, 1) - 1
+        self.depths[ident] = depth
+        if depth <= 0 and conn.in_transaction:
+            conn.rollback()
+
+    def prune_dead_threads(self):
+        """
+        Closes connections owned by threads that have exited
+        Returns: Number of connections closed
+        """
+        alive = {thread.ident for thread in threading.enumerate()}
+        dead = [ident for ident in self.connections if ident not in alive]
+        for ident in dead:
+            self.connections.pop(ident).close()
+            self.depths.pop(ident, None)
+        if dead:
+            self.condition.notify_all()
+        return len(dead)
+
+    def close_all(self):
+        """Closes every pooled connection"""
+        with self.condition:
+            for conn in self.connections.values():
+                conn.close()
+            self.connections.clear()
+            self.depths.clear()
+            self.condition.notify_all()
+
+    def stats(self):
+        """Returns a dictionary of pool counters"""
+        return {
+            "open": len(self.connections),
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+
+pool = None
+pool_lock = threading.Lock()
+
+
+def configure_pool(**options):
+    """
+    Replaces the shared pool; options are passed to ThreadLocalPool
+    """
+    global pool
+    with pool_lock:
+        if pool is not None:
+            pool.close_all()
+        pool = ThreadLocalPool(**options)
+    return pool
+
+
+def get_pool():
+    """
+    Returns the shared pool, creating it on first use
+    """
+    global pool
+    if pool is None:
+        with pool_lock:
+            if pool is None:
+                pool = ThreadLocalPool()
+    return pool
+
+
+class AsyncPool:
+    """
+    Provider of aiosqlite connections for coroutine functions
+
+    Up to `max_size` connections are opened on demand and kept for reuse;
+    a task that finds them all in use waits (first come, first served)
+    for up to `timeout` seconds. acquire() and release() are coroutines.
+    A pool belongs to the event loop it is first used on.
+    """
+
+    def __init__(self, database=DATABASE, max_size=10,
+                 cached_statements=128, timeout=30, **connect_kwargs):
+        if aiosqlite is None:
+            raise ImportError("AsyncPool requires aiosqlite")
+        self.database = database
+        self.max_size = max_size
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self.idle = []
+        self.slots = asyncio.Semaphore(max_size)
+        self.closed = False
+        self.created = 0
+        self.reused = 0
+
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhaustedError(
+                f"All {self.max_size} connections are in use"
+            ) from None
+        if self.idle:
+            self.reused += 1
+            return self.idle.pop()
+        try:
+            conn = await aiosqlite.connect(
+                self.database,
+                cached_statements=self.cached_statements,
+                **self.connect_kwargs
+            )
+        except BaseException:
+            self.slots.release()
+            raise
+        self.created += 1
+        return conn
+
+    async def release(self, conn):
+        """Returns a connection, rolling back work left uncommitted"""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            if self.closed:
+                await conn.close()
+            else:
+                self.idle.append(conn)
+        except Exception:
+            await conn.close()
+        finally:
+            self.slots.release()
+
+    async def close_all(self):
+        """
+        Closes the idle connections; connections still borrowed are closed
+        when they are released. aiosqlite runs each connection on its own
+        non-daemon thread, so an unclosed pool keeps the interpreter alive.
+        """
+        self.closed = True
+        while self.idle:
+            await self.idle.pop().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close_all()
+        return False
+
+    def stats(self):
+        return {
+            "open": len(self.idle),
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+
+async_pools = weakref.WeakKeyDictionary()
+async_pool_options = {}
+
+
+def configure_async_pool(**options):
+    """
+    Sets the AsyncPool options used for each event loop's shared pool
+    """
+    async_pool_options.clear()
+    async_pool_options.update(options)
+    async_pools.clear()
+
+
+def close_with_loop(pool):
+    """
+    Closes `pool` when the running event loop shuts down
+
+    The pool is closed from the finally block of an async generator that
+    is started here and left suspended; asyncio.run() finalizes pending
+    async generators (loop.shutdown_asyncgens) before closing the loop.
+    """
+    async def guard():
+        try:
+            yield
+        finally:
+            await pool.close_all()
+
+    # Keep a strong reference: the loop only tracks async generators weakly
+    pool.guard = guard()
+    asyncio.ensure_future(pool.guard.__anext__())
+
+
+def get_async_pool():
+    """
+    Returns the shared AsyncPool of the running event loop; it is closed
+    when that loop shuts down
+    """
+    loop = asyncio.get_running_loop()
+    pool = async_pools.get(loop)
+    if pool is None:
+        pool = async_pools[loop] = AsyncPool(**async_pool_options)
+        close_with_loop(pool)
+    return pool
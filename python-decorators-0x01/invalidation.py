@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Table-level invalidation shared by the caching and transaction decorators
+
+Every table has a generation number. A cached result remembers the
+generations of the tables its query read, and is stale once any of them
+moves on. transactional records which tables a transaction wrote (through
+sqlite3's trace callback) and bumps their generations after the commit.
+"""
+import contextlib
+import re
+import threading
+from collections import defaultdict
+
+# Write verbs are matched anywhere in a statement, so that writes behind a
+# WITH clause (WITH ... UPDATE users ...) are seen; a verb that is really
+# part of something else only costs an extra invalidation
+WRITE_PATTERN = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO"
+    r"|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM"
+    r"|DROP\s+TABLE(?:\s+IF\s+EXISTS)?|ALTER\s+TABLE)"
+    r"\s+(?!SET\b)[\"`\[]?(\w+)",
+    re.IGNORECASE
+)
+READ_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+[\"`\[]?(\w+)", re.IGNORECASE)
+COMMENT_PATTERN = re.compile(r"--[^\n]*|/\*.*?(?:\*/|$)", re.DOTALL)
+
+generations = defaultdict(int)
+lock = threading.Lock()
+
+
+def tables_read(query):
+    """Returns the lowercased names of the tables a query reads"""
+    query = COMMENT_PATTERN.sub(" ", query)
+    return frozenset(name.lower() for name in READ_PATTERN.findall(query))
+
+
+def tables_written(statement):
+    """Returns the lowercased names of the tables a statement writes"""
+    statement = COMMENT_PATTERN.sub(" ", statement)
+    return {name.lower() for name in WRITE_PATTERN.findall(statement)}
+
+
+def generation(tables):
+    """Returns the current generations of `tables`, in sorted order"""
+    with lock:
+        return tuple(generations[table] for table in sorted(tables))
+
+
+def invalidate(tables):
+    """Marks every cached result that read one of `tables` as stale"""
+    with lock:
+        for table in tables:
+            generations[table.lower()] += 1
+
+
+@contextlib.contextmanager
+def track_writes(conn):
+    """
+    Context manager that collects the tables written on a connection
+
+    Usage:
+        with track_writes(conn) as written:
+            ...
+        invalidate(written)
+    """
+    written = set()
+
+    def trace(statement):
+        written.update(tables_written(statement))
+
+    conn.set_trace_callback(trace)
+    try:
+        yield written
+    finally:
+        conn.set_trace_callback(None)
+
+
+@contextlib.asynccontextmanager
+async def track_writes_async(conn):
+    """track_writes for an aiosqlite connection"""
+    written = set()
+
+    def trace(statement):
+        written.update(tables_written(statement))
+
+    await conn.set_trace_callback(trace)
+    try:
+        yield written
+    finally:
+        await conn.set_trace_callback(None)
@@ -3,37 +3,69 @@
 Module that provides a generator function to stream users from a database
 """
 import mysql.connector
+seed = __import__('seed')
+rows_module = __import__('rows')
 
 
-def stream_users():
+def stream_users(chunk_size=1000, buffered=False, row_factory=None):
     """
     Generator function that streams rows from the user_data table one by one
-    
+
+    By default the cursor is unbuffered: rows stay on the server and are
+    pulled across in `fetchmany` chunks of `chunk_size`, so at most one
+    chunk is held in memory and the first row is available as soon as the
+    server starts sending. Pass `buffered=True` to read the whole result
+    set on the client before the first row is yielded.
+
+    Args:
+        chunk_size (int): Number of rows to prefetch from the server at once
+        buffered (bool): Buffer the full result set on the client
+        row_factory: "record", "tuple" or a class taking the columns
+            positionally, to yield compact rows instead of dictionaries
+
     Yields:
         One row at a time from the database as a dictionary
     """
+    row_factory = rows_module.resolve(row_factory)
+    connection = None
     try:
-        # Connect to the database
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="ALX_prodev"
+        # Borrow a connection from the shared pool
+        connection = seed.connect_to_prodev()
+        if not connection:
+            return
+
+        # Create a cursor that returns dictionaries, or plain tuples for
+        # a row factory to wrap
+        cursor = connection.cursor(
+            dictionary=row_factory is None, buffered=buffered
         )
-        
-        # Create a cursor that returns dictionaries
-        cursor = connection.cursor(dictionary=True)
-        
+
         # Execute query to get all users
-        cursor.execute("SELECT * FROM user_data")
-        
-        # Yield each row one by one - this is the only loop in the function
-        for row in cursor:
-            yield row
-            
+        if row_factory is None:
+            cursor.execute("SELECT * FROM user_data")
+        else:
+            cursor.execute(
+                f"SELECT {', '.join(rows_module.USER_COLUMNS)} FROM user_data"
+            )
+
+        # Pull one bounded chunk at a time and yield its rows one by one
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if row_factory is not None:
+                rows = [row_factory(*row) for row in rows]
+            yield from rows
+
         # Clean up (this code runs after the generator is exhausted)
         cursor.close()
-        connection.close()
-        
+
     except mysql.connector.Error as err:
         print(f"Error: {err}")
+
+    finally:
+        # Also runs when the consumer stops early (e.g. islice), so the
+        # connection goes back to the pool (which drops it if rows are
+        # still unread on the server)
+        if connection is not None:
+            connection.close()
@@ -3,72 +3,102 @@
 Module that provides functions to stream and process user data in batches
 """
 import mysql.connector
+seed = __import__('seed')
+predicates = __import__('predicates')
+columnar = __import__('columnar')
+rows_module = __import__('rows')
 
 
-def stream_users_in_batches(batch_size):
+def stream_users_in_batches(batch_size, where=None, columnar_output=False,
+                            pushdown=True, row_factory=None):
     """
     Generator function that fetches rows in batches from the user_data table
-    
+
     Args:
         batch_size (int): Number of rows to fetch in each batch
-        
+        where (Predicate): Optional filter, e.g. col('age') > 25; pushed
+            down into the SQL WHERE clause when possible
+        columnar_output (bool): Yield columnar.ColumnBatch objects instead
+            of lists of dictionaries; client-side filters then run as
+            vectorized masks
+        pushdown (bool): Set to False to evaluate `where` entirely on the
+            client
+        row_factory: "record", "tuple" or a class taking the columns
+            positionally, to build compact rows instead of dictionaries
+
     Yields:
         List of dictionaries, each representing a row from the database
+        (or one ColumnBatch per batch in columnar mode)
     """
+    if pushdown:
+        server_filter, client_filter = predicates.split_predicate(where)
+    else:
+        server_filter, client_filter = None, where
+
+    row_factory = rows_module.resolve(row_factory)
+    columns = None if row_factory is None else rows_module.USER_COLUMNS
+
+    # Borrow a connection from the shared pool
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+
     try:
-        # Connect to the database
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="ALX_prodev"
-        )
-        
-        # Create a cursor that returns dictionaries
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get total number of rows
-        cursor.execute("SELECT COUNT(*) as count FROM user_data")
-        total_rows = cursor.fetchone()['count']
-        
-        # Process in batches
-        offset = 0
-        while offset < total_rows:
-            # Execute query to get a batch of users
-            cursor.execute(f"SELECT * FROM user_data LIMIT {batch_size} OFFSET {offset}")
-            batch = cursor.fetchall()
-            
-            # If no more rows, break the loop
-            if not batch:
-                break
-                
-            # Yield the batch
-            yield batch
-            
-            # Update offset for next batch
-            offset += batch_size
-        
-        # Clean up
-        cursor.close()
-        connection.close()
-        
+        # Walk the table with keyset pagination so that every batch costs
+        # the same, no matter how deep into the table it is
+        if not columnar_output:
+            for batch in seed.paginate_by_key(
+                    connection, "user_data", batch_size,
+                    where=server_filter, columns=columns):
+                if row_factory is not None:
+                    batch = [row_factory(*row) for row in batch]
+                if client_filter is not None:
+                    batch = [user for user in batch if client_filter(user)]
+                if batch:
+                    yield batch
+        else:
+            # Plain tuples skip the per-row dictionary entirely
+            for rows in seed.paginate_by_key(
+                    connection, "user_data", batch_size,
+                    where=server_filter, columns=columnar.USER_COLUMNS):
+                batch = columnar.ColumnBatch.from_rows(rows)
+                if client_filter is not None:
+                    batch = batch.filter(columnar.mask(batch, client_filter))
+                if len(batch):
+                    yield batch
+
     except mysql.connector.Error as err:
         print(f"Error: {err}")
 
+    finally:
+        # Clean up: return the connection to the pool, even when the
+        # consumer stops early
+        connection.close()
+
 
-def batch_processing(batch_size):
+def batch_processing(batch_size, columnar_output=False):
     """
     Processes each batch to filter users over the age of 25
-    
+
+    The age filter runs on the server, so only matching users are sent
+    back; an index on age is created first if it is missing.
+
     Args:
         batch_size (int): Number of rows to fetch in each batch
+        columnar_output (bool): Stream columnar batches instead of dicts
     """
-    # Stream users in batches
-    for batch in stream_users_in_batches(batch_size):
+    connection = seed.connect_to_prodev()
+    if connection:
+        seed.ensure_index(connection, "user_data", "age")
+        connection.close()
+
+    # Stream users over the age of 25 in batches
+    over_25 = predicates.col('age') > 25
+    for batch in stream_users_in_batches(
+            batch_size, where=over_25, columnar_output=columnar_output):
+        users = batch.rows() if columnar_output else batch
         # Process each user in the batch
-        for user in batch:
-            # Filter users over the age of 25
-            if user['age'] > 25:
-                # Print the user with a blank line after each user for readability
-                print(user)
-                print()
+        for user in users:
+            # Print the user with a blank line after each user for readability
+            print(user)
+            print()
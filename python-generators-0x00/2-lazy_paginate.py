@@ -3,50 +3,135 @@
 Module that provides a generator function for lazy pagination of user data
 """
 seed = __import__('seed')
+rows_module = __import__('rows')
 
 
-def paginate_users(page_size, offset):
+def paginate_users(page_size, offset=0, after=None, row_factory=None):
     """
     Fetches a page of users from the database
-    
+
+    When `after` is given (or on the first page) the page is read through
+    seed.paginate_by_key, a keyset seek on user_id that costs the same for
+    every page. `offset` is kept for callers that still address pages by
+    position.
+
     Args:
         page_size (int): Number of rows to fetch in each page
         offset (int): Starting position for fetching rows
-        
+        after (str): user_id of the last row of the previous page (optional)
+        row_factory: "record", "tuple" or a class taking the columns
+            positionally, to build compact rows instead of dictionaries
+
     Returns:
         List of dictionaries, each representing a row from the database
+        (empty if the database cannot be reached)
+    """
+    row_factory = rows_module.resolve(row_factory)
+    columns = None
+    if row_factory is not None:
+        columns = rows_module.USER_COLUMNS
+
+    rows = fetch_page(page_size, offset, after, columns)
+    if row_factory is not None:
+        rows = [row_factory(*row) for row in rows]
+    return rows
+
+
+def fetch_page(page_size, offset=0, after=None, columns=None):
+    """
+    Fetches a page of raw rows for paginate_users and lazy_pagination
+
+    Returns:
+        List of dictionaries, or tuples in `columns` order when given
+        (empty if the database cannot be reached)
     """
     connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
+    if not connection:
+        return []
+    try:
+        if offset and after is None:
+            rows = fetch_offset_page(connection, page_size, offset, columns)
+        else:
+            pages = seed.paginate_by_key(connection, "user_data", page_size,
+                                         after=after, columns=columns)
+            try:
+                rows = next(pages, [])
+            finally:
+                # Closes the generator's cursor
+                pages.close()
+    finally:
+        # Return the connection to the pool even if the query fails
+        connection.close()
     return rows
 
 
-def lazy_pagination(page_size):
+def fetch_offset_page(connection, page_size, offset, columns=None):
+    """
+    Fetches the page starting at a row position with LIMIT/OFFSET
+
+    Returns:
+        List of dictionaries, or tuples in `columns` order when given
+    """
+    select = "*" if columns is None else ", ".join(columns)
+    cursor = connection.cursor(dictionary=columns is None)
+    try:
+        cursor.execute(
+            f"SELECT {select} FROM user_data ORDER BY user_id "
+            "LIMIT %s OFFSET %s",
+            (page_size, offset)
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def lazy_pagination(page_size, prefetch=0, row_factory=None):
     """
     Generator function that implements lazy loading of paginated data
-    
+
     Args:
         page_size (int): Number of rows to fetch in each page
-        
+        prefetch (int): Pages to fetch ahead on a background thread while
+            the consumer works on the current one (0 disables read-ahead)
+        row_factory: "record", "tuple" or a class taking the columns
+            positionally, to build compact rows instead of dictionaries
+
     Yields:
         List of dictionaries, each representing a page of data
     """
-    offset = 0
-    
+    if prefetch > 0:
+        yield from seed.read_ahead(
+            lazy_pagination(page_size, row_factory=row_factory), prefetch
+        )
+        return
+
+    row_factory = rows_module.resolve(row_factory)
+    columns, key = None, "user_id"
+    if row_factory is not None:
+        # Raw rows are tuples; the seek key is read from them before the
+        # factory wraps them, so any row class works
+        columns = rows_module.USER_COLUMNS
+        key = columns.index("user_id")
+    after = None
+
     # This is the only loop in the function
     while True:
-        # Get the next page of data
-        page = paginate_users(page_size, offset)
-        
+        # Get the next page of data, seeking past the last row we returned
+        rows = fetch_page(page_size, after=after, columns=columns)
+
         # If no more data, stop iteration
-        if not page:
+        if not rows:
             break
-            
+
         # Yield the page
-        yield page
-        
-        # Update offset for next page
-        offset += page_size
+        if row_factory is None:
+            yield rows
+        else:
+            yield [row_factory(*row) for row in rows]
+
+        # A short page means the end of the table has been reached
+        if len(rows) < page_size:
+            break
+
+        # Remember the last key for the next seek
+        after = rows[-1][key]
@@ -3,8 +3,23 @@
 Module that provides functions to calculate the average age of users
 in a memory-efficient way using generators
 """
+import math
+from array import array
+from collections import Counter
+
 import mysql.connector
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+seed = __import__('seed')
+age_stats = __import__('age_stats')
+
+# Nearest-rank percentiles reported by the aggregation strategies
+PERCENTILES = (50, 90, 99)
+
 
 def stream_user_ages():
     """
@@ -13,15 +28,12 @@ def stream_user_ages():
     Yields:
         int: Age of a user
     """
+    # Borrow a connection from the shared pool
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+
     try:
-        # Connect to the database
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="ALX_prodev"
-        )
-        
         # Create a cursor
         cursor = connection.cursor()
         
@@ -34,27 +46,256 @@ def stream_user_ages():
             
         # Clean up
         cursor.close()
-        connection.close()
         
     except mysql.connector.Error as err:
         print(f"Error: {err}")
 
+    finally:
+        # Return the connection to the pool, even when the consumer stops
+        # early
+        connection.close()
+
+
+def stream_age_chunks(chunk_size=10000):
+    """
+    Generator function that yields user ages in chunks packed into
+    array('d') buffers, pulled from the server with fetchmany
+
+    Args:
+        chunk_size (int): Number of ages to fetch per round trip
+
+    Yields:
+        array: Chunk of ages as doubles
+    """
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT age FROM user_data")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield array('d', (float(age) for (age,) in rows))
+        cursor.close()
+    finally:
+        connection.close()
+
+
+def nearest_rank(histogram, count, percentile):
+    """
+    Returns the nearest-rank percentile from an {age: count} histogram
+    """
+    rank = max(1, math.ceil(percentile / 100 * count))
+    seen = 0
+    for age in sorted(histogram):
+        seen += histogram[age]
+        if seen >= rank:
+            return age
+    return None
+
+
+def empty_stats(percentiles=PERCENTILES):
+    """
+    Returns the statistics of an empty table
+    """
+    return {
+        "count": 0,
+        "sum": 0.0,
+        "mean": None,
+        "variance": None,
+        "min": None,
+        "max": None,
+        "percentiles": {percentile: None for percentile in percentiles},
+    }
+
+
+def age_stats_pushdown(percentiles=PERCENTILES):
+    """
+    Computes age statistics on the server with aggregate queries, so only
+    a handful of values cross the wire
+
+    Args:
+        percentiles (tuple): Nearest-rank percentiles to compute
+
+    Returns:
+        dict: count, sum, mean, variance, min, max and percentiles
+    """
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return empty_stats(percentiles)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT COUNT(age), SUM(age), MIN(age), MAX(age), VAR_POP(age) "
+            "FROM user_data"
+        )
+        count, total, minimum, maximum, variance = cursor.fetchone()
+        if not count:
+            cursor.close()
+            return empty_stats(percentiles)
+
+        # Each percentile walks `rank` entries of the age index on the
+        # server (OFFSET cannot seek), but only the one value is sent back
+        values = {}
+        for percentile in percentiles:
+            rank = max(1, math.ceil(percentile / 100 * count))
+            cursor.execute(
+                "SELECT age FROM user_data ORDER BY age LIMIT 1 OFFSET %s",
+                (rank - 1,)
+            )
+            values[percentile] = float(cursor.fetchone()[0])
+        cursor.close()
+    finally:
+        connection.close()
+
+    return {
+        "count": count,
+        "sum": float(total),
+        "mean": float(total) / count,
+        "variance": float(variance),
+        "min": float(minimum),
+        "max": float(maximum),
+        "percentiles": values,
+    }
+
+
+def chunk_stats(chunk):
+    """
+    Returns (count, sum, mean, M2, min, max, histogram) for one chunk,
+    vectorized with NumPy when it is available
+    """
+    if np is not None:
+        ages = np.frombuffer(chunk, dtype=np.float64)
+        total = float(ages.sum())
+        mean = total / len(ages)
+        m2 = float(np.square(ages - mean).sum())
+        values, counts = np.unique(ages, return_counts=True)
+        histogram = dict(zip(values.tolist(), counts.tolist()))
+        return (len(ages), total, mean, m2,
+                float(ages.min()), float(ages.max()), histogram)
+
+    total = math.fsum(chunk)
+    mean = total / len(chunk)
+    m2 = math.fsum((age - mean) ** 2 for age in chunk)
+    return (len(chunk), total, mean, m2,
+            min(chunk), max(chunk), Counter(chunk))
+
+
+def age_stats_streaming(chunk_size=10000, percentiles=PERCENTILES):
+    """
+    Computes age statistics in a single pass over fetchmany chunks
+
+    Each chunk is reduced on its own and merged into the running totals
+    with the parallel form of Welford's online variance, so memory use is
+    bounded by one chunk plus a histogram of distinct ages.
+
+    Args:
+        chunk_size (int): Number of ages to fetch per round trip
+        percentiles (tuple): Nearest-rank percentiles to compute
+
+    Returns:
+        dict: count, sum, mean, variance, min, max and percentiles
+    """
+    count = 0
+    total = 0.0
+    mean = 0.0
+    m2 = 0.0
+    minimum = maximum = None
+    histogram = Counter()
+
+    for chunk in stream_age_chunks(chunk_size):
+        (n, chunk_total, chunk_mean, chunk_m2,
+         chunk_min, chunk_max, chunk_histogram) = chunk_stats(chunk)
+
+        # Merge the chunk into the running mean and sum of squared deviations
+        delta = chunk_mean - mean
+        merged = count + n
+        mean += delta * n / merged
+        m2 += chunk_m2 + delta * delta * count * n / merged
+        count = merged
+
+        total = math.fsum((total, chunk_total))
+        minimum = chunk_min if minimum is None else min(minimum, chunk_min)
+        maximum = chunk_max if maximum is None else max(maximum, chunk_max)
+        histogram.update(chunk_histogram)
+
+    if not count:
+        return empty_stats(percentiles)
+
+    return {
+        "count": count,
+        "sum": total,
+        # Derive the mean from the exact sum so both strategies agree
+        "mean": total / count,
+        "variance": m2 / count,
+        "min": minimum,
+        "max": maximum,
+        "percentiles": {
+            percentile: nearest_rank(histogram, count, percentile)
+            for percentile in percentiles
+        },
+    }
+
 
-def calculate_average_age():
+def age_stats_stored(percentiles=PERCENTILES):
+    """
+    Reads age statistics from the incrementally maintained aggregate
+    tables (see age_stats), in O(1) with respect to the table size
+
+    Returns:
+        dict: count, sum, mean, variance, min, max and percentiles
+    """
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return empty_stats(percentiles)
+    try:
+        return age_stats.read_age_stats(connection, percentiles)
+    finally:
+        connection.close()
+
+
+AGGREGATION_STRATEGIES = {
+    "pushdown": age_stats_pushdown,
+    "streaming": age_stats_streaming,
+    "stored": age_stats_stored,
+}
+
+
+def calculate_average_age(strategy="pushdown"):
     """
     Calculates the average age without loading the entire dataset into memory
-    
+
+    Args:
+        strategy (str): "pushdown" to aggregate on the server, "streaming"
+            to aggregate fetchmany chunks on the client, "stored" to read
+            the maintained aggregates without a scan, or "generator" to
+            sum the ages yielded one by one by stream_user_ages
+
     Returns:
         float: Average age of users
+
+    Raises:
+        ValueError: If `strategy` is not one of the above
     """
-    total_age = 0
-    count = 0
-    
-    # Use the generator to stream ages one by one
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
-    
+    if strategy in AGGREGATION_STRATEGIES:
+        stats = AGGREGATION_STRATEGIES[strategy]()
+        total_age, count = stats["sum"], stats["count"]
+    elif strategy == "generator":
+        total_age = 0
+        count = 0
+
+        # Use the generator to stream ages one by one
+        for age in stream_user_ages():
+            total_age += age
+            count += 1
+    else:
+        raise ValueError(
+            f"Unknown strategy {strategy!r}; expected one of "
+            f"{sorted([*AGGREGATION_STRATEGIES, 'generator'])}"
+        )
+
     # Calculate and return the average age
     if count > 0:
         average_age = total_age / count
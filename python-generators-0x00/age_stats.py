@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+"""
+Persistent, incrementally maintained age statistics for user_data
+
+The count, sum and sum of squares of `age`, plus a histogram of ages,
+are stored in two small tables that seed.insert_data updates in the same
+transaction as each inserted batch. Average and distribution queries are
+then answered from those tables without scanning user_data.
+
+Usage: ./age_stats.py [show|rebuild|check]
+"""
+import math
+import sys
+from collections import Counter
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
+import mysql.connector
+
+# Nearest-rank percentiles reported by read_age_stats
+PERCENTILES = (50, 90, 99)
+
+
+def create_stats_tables(connection):
+    """
+    Creates the aggregate tables if they do not exist
+    Args:
+        connection: MySQL connection object
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_data_age_stats (
+            id TINYINT PRIMARY KEY,
+            row_count BIGINT NOT NULL,
+            age_sum DECIMAL(38, 0) NOT NULL,
+            age_sum_sq DECIMAL(38, 0) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_data_age_histogram (
+            age DECIMAL(10, 0) PRIMARY KEY,
+            row_count BIGINT NOT NULL
+        )
+    """)
+    connection.commit()
+    cursor.close()
+
+
+def stored_age(age):
+    """
+    Returns an age as the DECIMAL(10, 0) column stores it, e.g. '67.5'
+    becomes 68
+    """
+    return Decimal(age).to_integral_value(rounding=ROUND_HALF_UP)
+
+
+def record_inserted(cursor, rows):
+    """
+    Adds freshly inserted rows to the aggregates
+
+    Must run on the cursor that inserted them, before the commit, so the
+    aggregates change in the same transaction as user_data.
+
+    Args:
+        cursor: Cursor of the inserting transaction
+        rows: Inserted (user_id, name, email, age) tuples
+    """
+    ages = [stored_age(row[3]) for row in rows]
+    if not ages:
+        return
+    cursor.execute("""
+        INSERT INTO user_data_age_stats (id, row_count, age_sum, age_sum_sq)
+        VALUES (1, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            row_count = row_count + VALUES(row_count),
+            age_sum = age_sum + VALUES(age_sum),
+            age_sum_sq = age_sum_sq + VALUES(age_sum_sq)
+    """, (len(ages), sum(ages), sum(age * age for age in ages)))
+    cursor.executemany("""
+        INSERT INTO user_data_age_histogram (age, row_count)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE row_count = row_count + VALUES(row_count)
+    """, list(Counter(ages).items()))
+
+
+def rebuild_age_stats(connection):
+    """
+    Recomputes the aggregates from a full scan of user_data
+    Args:
+        connection: MySQL connection object
+    """
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM user_data_age_stats")
+    cursor.execute("DELETE FROM user_data_age_histogram")
+    cursor.execute("""
+        INSERT INTO user_data_age_stats (id, row_count, age_sum, age_sum_sq)
+        SELECT 1, COUNT(*), COALESCE(SUM(age), 0), COALESCE(SUM(age * age), 0)
+        FROM user_data
+    """)
+    cursor.execute("""
+        INSERT INTO user_data_age_histogram (age, row_count)
+        SELECT age, COUNT(*) FROM user_data GROUP BY age
+    """)
+    connection.commit()
+    cursor.close()
+
+
+def read_totals(cursor):
+    """
+    Returns the stored (count, sum, sum of squares) and {age: count}
+    """
+    cursor.execute(
+        "SELECT row_count, age_sum, age_sum_sq FROM user_data_age_stats "
+        "WHERE id = 1"
+    )
+    totals = cursor.fetchone() or (0, 0, 0)
+    cursor.execute("SELECT age, row_count FROM user_data_age_histogram")
+    histogram = {age: count for age, count in cursor.fetchall() if count}
+    return tuple(totals), histogram
+
+
+def read_age_stats(connection, percentiles=PERCENTILES):
+    """
+    Answers age statistics from the aggregate tables, without a scan of
+    user_data
+
+    Args:
+        connection: MySQL connection object
+        percentiles (tuple): Nearest-rank percentiles to compute
+
+    Returns:
+        dict: count, sum, mean, variance, min, max and percentiles, in
+        the same shape as the aggregation strategies of 4-stream_ages
+    """
+    cursor = connection.cursor()
+    (count, total, total_sq), histogram = read_totals(cursor)
+    cursor.close()
+
+    if not count:
+        return {
+            "count": 0, "sum": 0.0, "mean": None, "variance": None,
+            "min": None, "max": None,
+            "percentiles": {percentile: None for percentile in percentiles},
+        }
+
+    mean = Fraction(total) / count
+    ages = sorted(histogram)
+    return {
+        "count": count,
+        "sum": float(total),
+        "mean": float(mean),
+        "variance": float(Fraction(total_sq) / count - mean * mean),
+        "min": float(ages[0]),
+        "max": float(ages[-1]),
+        "percentiles": {
+            percentile: float(nearest_rank(ages, histogram, count, percentile))
+            for percentile in percentiles
+        },
+    }
+
+
+def nearest_rank(ages, histogram, count, percentile):
+    """
+    Returns the nearest-rank percentile from sorted ages and their counts
+    """
+    rank = max(1, math.ceil(percentile / 100 * count))
+    seen = 0
+    for age in ages:
+        seen += histogram[age]
+        if seen >= rank:
+            return age
+    return ages[-1]
+
+
+def check_age_stats(connection):
+    """
+    Compares the stored aggregates with a live scan of user_data
+
+    Returns:
+        dict: consistent (bool), stored and live (totals, histogram)
+    """
+    cursor = connection.cursor()
+    stored = read_totals(cursor)
+    cursor.execute(
+        "SELECT COUNT(*), COALESCE(SUM(age), 0), COALESCE(SUM(age * age), 0) "
+        "FROM user_data"
+    )
+    live_totals = tuple(cursor.fetchone())
+    cursor.execute("SELECT age, COUNT(*) FROM user_data GROUP BY age")
+    live = (live_totals, dict(cursor.fetchall()))
+    cursor.close()
+    return {"consistent": stored == live, "stored": stored, "live": live}
+
+
+def main(command="show"):
+    """
+    Command line entry point: show, rebuild or check the aggregates
+    """
+    seed = __import__('seed')
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return 1
+    try:
+        create_stats_tables(connection)
+        if command == "rebuild":
+            rebuild_age_stats(connection)
+            print("Age statistics rebuilt")
+        elif command == "check":
+            result = check_age_stats(connection)
+            if not result["consistent"]:
+                print(f"Age statistics are stale: stored {result['stored'][0]}"
+                      f", live {result['live'][0]}")
+                return 1
+            print("Age statistics are consistent")
+        elif command == "show":
+            print(read_age_stats(connection))
+        else:
+            print(f"Unknown command: {command}")
+            return 2
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        return 1
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
@@ -0,0 +1,207 @@
+#!/usr/bin/python3
+"""
+Module that provides `async for` versions of the user streaming generators
+
+Each stream runs on its own connection from an async driver, so a single
+event loop can drive thousands of concurrent streams without a thread per
+stream. The "mysql" backend uses aiomysql against ALX_prodev; the
+"sqlite" backend uses aiosqlite against a local file holding a user_data
+table, as a stand-in for tests and offline runs.
+"""
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+# Default SQLite stand-in database
+SQLITE_PATH = "user_data.db"
+
+
+class AsyncSource:
+    """
+    Thin wrapper over an async connection that hides the differences
+    between the MySQL and SQLite drivers
+
+    Queries are written with %s placeholders and translated for SQLite.
+    """
+
+    def __init__(self, backend, connection):
+        self.backend = backend
+        self.connection = connection
+        self.finished = True
+
+    async def chunks(self, query, params=(), chunk_size=1000):
+        """
+        Async generator that runs a query and yields its rows in lists of
+        at most `chunk_size` dictionaries, reading them from the server a
+        chunk at a time
+        """
+        self.finished = False
+        if self.backend == "mysql":
+            cursor = await self.connection.cursor(aiomysql.SSDictCursor)
+            await cursor.execute(query, params)
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield list(rows)
+        else:
+            cursor = await self.connection.execute(
+                query.replace("%s", "?"), params
+            )
+            names = [column[0] for column in cursor.description]
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(zip(names, row)) for row in rows]
+        await cursor.close()
+        self.finished = True
+
+    async def fetchall(self, query, params=()):
+        """Runs a query and returns all of its rows as dictionaries"""
+        rows = []
+        async for chunk in self.chunks(query, params):
+            rows.extend(chunk)
+        return rows
+
+    async def close(self):
+        """
+        Closes the connection; a MySQL stream abandoned part way is closed
+        at the socket rather than drained
+        """
+        if self.backend == "mysql":
+            if self.finished:
+                self.connection.close()
+                await self.connection.wait_closed()
+            else:
+                self.connection.close()
+        else:
+            await self.connection.close()
+
+
+async def open_source(backend="mysql", database=None):
+    """
+    Opens an async connection to the user_data table
+
+    Args:
+        backend (str): "mysql" (aiomysql) or "sqlite" (aiosqlite)
+        database (str): Database name (MySQL) or file path (SQLite)
+
+    Returns:
+        AsyncSource
+    """
+    if backend == "mysql":
+        if aiomysql is None:
+            raise ImportError("The mysql backend requires aiomysql")
+        connection = await aiomysql.connect(
+            host="localhost",
+            user="root",
+            password="",
+            db=database or "ALX_prodev"
+        )
+    elif backend == "sqlite":
+        if aiosqlite is None:
+            raise ImportError("The sqlite backend requires aiosqlite")
+        connection = await aiosqlite.connect(database or SQLITE_PATH)
+    else:
+        raise ValueError(f"Unknown backend: {backend!r}")
+    return AsyncSource(backend, connection)
+
+
+async def paginate_by_key(source, page_size, key="user_id"):
+    """
+    Async generator that walks user_data with keyset pagination
+
+    Yields:
+        List of dictionaries, one page of rows at a time
+    """
+    last_key = None
+    while True:
+        if last_key is None:
+            page = await source.fetchall(
+                f"SELECT * FROM user_data ORDER BY {key} LIMIT %s",
+                (page_size,)
+            )
+        else:
+            page = await source.fetchall(
+                f"SELECT * FROM user_data WHERE {key} > %s "
+                f"ORDER BY {key} LIMIT %s",
+                (last_key, page_size)
+            )
+        if not page:
+            break
+        yield page
+        if len(page) < page_size:
+            break
+        last_key = page[-1][key]
+
+
+async def stream_users(chunk_size=1000, backend="mysql", database=None):
+    """
+    Async generator that streams rows from the user_data table one by one
+
+    Yields:
+        One row at a time as a dictionary
+    """
+    source = await open_source(backend, database)
+    try:
+        async for rows in source.chunks("SELECT * FROM user_data",
+                                        chunk_size=chunk_size):
+            for row in rows:
+                yield row
+    finally:
+        await source.close()
+
+
+async def stream_users_in_batches(batch_size, backend="mysql", database=None):
+    """
+    Async generator that fetches rows from user_data in batches
+
+    Yields:
+        List of dictionaries, one batch at a time
+    """
+    source = await open_source(backend, database)
+    try:
+        async for batch in paginate_by_key(source, batch_size):
+            yield batch
+    finally:
+        await source.close()
+
+
+async def lazy_pagination(page_size, backend="mysql", database=None):
+    """
+    Async generator that lazily loads one page of users at a time; the
+    next page is only requested when the consumer asks for it
+
+    Yields:
+        List of dictionaries, one page at a time
+    """
+    source = await open_source(backend, database)
+    try:
+        async for page in paginate_by_key(source, page_size):
+            yield page
+    finally:
+        await source.close()
+
+
+async def stream_user_ages(chunk_size=1000, backend="mysql", database=None):
+    """
+    Async generator that yields user ages one by one
+
+    Yields:
+        Age of a user
+    """
+    source = await open_source(backend, database)
+    try:
+        async for rows in source.chunks("SELECT age FROM user_data",
+                                        chunk_size=chunk_size):
+            for row in rows:
+                yield row["age"]
+    finally:
+        await source.close()
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""
+Benchmark of the age aggregation strategies in 4-stream_ages
+
+Times every strategy over user_data and checks that they agree.
+
+Usage: ./bench_aggregation.py [chunk_size]
+"""
+import math
+import sys
+import time
+stream_ages = __import__('4-stream_ages')
+
+
+def main(chunk_size=10000):
+    """
+    Prints the time taken by each strategy and whether the results match
+    """
+    start = time.perf_counter()
+    pushdown = stream_ages.age_stats_pushdown()
+    pushdown_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streaming = stream_ages.age_stats_streaming(chunk_size)
+    streaming_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total = count = 0
+    for age in stream_ages.stream_user_ages():
+        total += age
+        count += 1
+    generator_seconds = time.perf_counter() - start
+
+    print(f"rows: {pushdown['count']}")
+    print(f"pushdown:  {pushdown_seconds * 1000:10.2f} ms")
+    print(f"streaming: {streaming_seconds * 1000:10.2f} ms")
+    print(f"generator: {generator_seconds * 1000:10.2f} ms")
+
+    exact = ("count", "sum", "mean", "min", "max", "percentiles")
+    mismatches = [key for key in exact if pushdown[key] != streaming[key]]
+    if pushdown["count"] and not math.isclose(
+            pushdown["variance"], streaming["variance"], rel_tol=1e-9):
+        mismatches.append("variance")
+    print("results match" if not mismatches
+          else f"results differ: {', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""
+Benchmark of columnar batches against lists of row dictionaries
+
+Builds a synthetic batch shaped like user_data (no database needed) and
+compares bytes per row and the time taken to filter users over 25.
+
+Usage: ./bench_columnar.py [rows]
+"""
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+columnar = __import__('columnar')
+predicates = __import__('predicates')
+
+
+def synthetic_rows(count):
+    """
+    Returns row tuples in user_data column order; ages are Decimal, as the
+    MySQL driver returns them for a DECIMAL column
+    """
+    rng = random.Random(0)
+    return [
+        (str(uuid.UUID(int=rng.getrandbits(128))), f"User Name {i}",
+         f"user.{i}@example.com", Decimal(rng.randint(18, 120)))
+        for i in range(count)
+    ]
+
+
+def copy_value(value):
+    """
+    Returns a fresh copy of a str or Decimal value
+    """
+    if isinstance(value, str):
+        return (value + ".")[:-1]
+    return value.copy_abs()
+
+
+def measure(build):
+    """
+    Returns (result, bytes allocated by build())
+    """
+    tracemalloc.start()
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, allocated
+
+
+def main(count=50000):
+    """
+    Prints per-row memory and filter time for both layouts
+    """
+    rows = synthetic_rows(count)
+    names = columnar.USER_COLUMNS
+
+    # Copy every value, as the driver creates fresh objects for each row
+    dicts, dict_bytes = measure(lambda: [
+        {name: copy_value(value) for name, value in zip(names, row)}
+        for row in rows
+    ])
+    batch, batch_bytes = measure(
+        lambda: columnar.ColumnBatch.from_rows(rows)
+    )
+
+    start = time.perf_counter()
+    over_25_dicts = [user for user in dicts if user['age'] > 25]
+    dict_seconds = time.perf_counter() - start
+
+    over_25 = predicates.col('age') > 25
+    start = time.perf_counter()
+    over_25_batch = batch.filter(columnar.mask(batch, over_25))
+    batch_seconds = time.perf_counter() - start
+
+    assert len(over_25_dicts) == len(over_25_batch)
+    print(f"rows: {count} (NumPy: {'yes' if columnar.np else 'no'})")
+    print(f"dicts:    {dict_bytes / count:8.1f} bytes/row, "
+          f"filter {dict_seconds * 1000:8.2f} ms")
+    print(f"columnar: {batch_bytes / count:8.1f} bytes/row, "
+          f"filter {batch_seconds * 1000:8.2f} ms")
+    print(f"memory ratio: {dict_bytes / batch_bytes:.1f}x, "
+          f"filter speedup: {dict_seconds / batch_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
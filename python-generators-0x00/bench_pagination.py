@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""
+Benchmark comparing LIMIT/OFFSET pagination with keyset (seek) pagination
+over the user_data table
+
+Usage: ./bench_pagination.py [page_size] [samples]
+"""
+import sys
+import time
+seed = __import__('seed')
+
+
+def time_offset_page(cursor, page_size, offset):
+    """
+    Times a single LIMIT/OFFSET page at the given position
+
+    Returns:
+        float: Seconds taken to fetch the page
+    """
+    start = time.perf_counter()
+    cursor.execute(
+        "SELECT * FROM user_data ORDER BY user_id LIMIT %s OFFSET %s",
+        (page_size, offset)
+    )
+    cursor.fetchall()
+    return time.perf_counter() - start
+
+
+def time_keyset_page(connection, page_size, after):
+    """
+    Times a single seed.paginate_by_key page starting after the given user_id
+
+    Returns:
+        float: Seconds taken to fetch the page
+    """
+    start = time.perf_counter()
+    pages = seed.paginate_by_key(connection, "user_data", page_size,
+                                 after=after)
+    next(pages, None)
+    elapsed = time.perf_counter() - start
+    pages.close()
+    return elapsed
+
+
+def time_full_scan(connection, page_size):
+    """
+    Times a complete walk of the table with each strategy
+
+    Returns:
+        tuple: (offset_seconds, keyset_seconds, rows)
+    """
+    cursor = connection.cursor(dictionary=True)
+    start = time.perf_counter()
+    offset = 0
+    while True:
+        cursor.execute(
+            "SELECT * FROM user_data ORDER BY user_id LIMIT %s OFFSET %s",
+            (page_size, offset)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        offset += len(rows)
+    offset_seconds = time.perf_counter() - start
+    cursor.close()
+
+    start = time.perf_counter()
+    rows = 0
+    for page in seed.paginate_by_key(connection, "user_data", page_size):
+        rows += len(page)
+    keyset_seconds = time.perf_counter() - start
+
+    return offset_seconds, keyset_seconds, rows
+
+
+def main(page_size=100, samples=5):
+    """
+    Prints per-page latency at increasing depths, then full-scan totals
+    """
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM user_data")
+    total_rows = cursor.fetchone()[0]
+    cursor.close()
+
+    print(f"user_data rows: {total_rows}, page size: {page_size}")
+    print(f"{'depth':>12} {'offset ms':>12} {'keyset ms':>12}")
+
+    cursor = connection.cursor()
+    for step in range(samples):
+        depth = total_rows * step // samples
+        # Find the key that starts the page at this depth once, outside
+        # of the timed section
+        cursor.execute(
+            "SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET %s",
+            (max(depth - 1, 0),)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            break
+        offset_seconds = time_offset_page(cursor, page_size, depth)
+        keyset_seconds = time_keyset_page(connection, page_size, row[0])
+        print(f"{depth:>12} {offset_seconds * 1000:>12.2f} "
+              f"{keyset_seconds * 1000:>12.2f}")
+    cursor.close()
+
+    offset_seconds, keyset_seconds, rows = time_full_scan(connection, page_size)
+    print(f"full scan of {rows} rows: offset {offset_seconds:.2f}s, "
+          f"keyset {keyset_seconds:.2f}s")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
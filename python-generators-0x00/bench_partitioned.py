@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""
+Benchmark of partitioned_scan.scan_partitioned against partition count
+
+Runs a batch_processing-style job (count users over 25 with a CPU-bound
+check per row) with 1, 2, 4, ... partitions and prints the speedup over
+a single partition.
+
+Usage: ./bench_partitioned.py [max_partitions] [executor] [page_size]
+"""
+import sys
+import time
+partitioned_scan = __import__('partitioned_scan')
+
+
+def count_over_25(page):
+    """
+    Counts users over 25 in one page; runs inside the workers
+    """
+    return sum(1 for user in page if user['age'] > 25 and user['email'])
+
+
+def main(max_partitions=8, executor="process", page_size=1000):
+    """
+    Prints elapsed time and speedup for each partition count
+    """
+    baseline = None
+    partitions = 1
+    print(f"{'partitions':>10} {'rows':>10} {'seconds':>10} {'speedup':>8}")
+    while partitions <= max_partitions:
+        start = time.perf_counter()
+        total = sum(partitioned_scan.scan_partitioned(
+            partitions, page_size, transform=count_over_25,
+            executor=executor))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{partitions:>10} {total:>10} {elapsed:>10.3f} "
+              f"{baseline / elapsed:>8.2f}x")
+        partitions *= 2
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 8,
+         args[1] if len(args) > 1 else "process",
+         int(args[2]) if len(args) > 2 else 1000)
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Benchmark of the row types a streamer can yield
+
+Builds synthetic user_data rows (no database needed) the way each
+cursor mode would and reports bytes per row and rows built per second.
+
+Usage: ./bench_rows.py [rows]
+"""
+import sys
+import time
+import tracemalloc
+rows_module = __import__('rows')
+bench_columnar = __import__('bench_columnar')
+
+
+def builders():
+    """
+    Returns {label: function turning one raw tuple into a row}
+    """
+    names = rows_module.USER_COLUMNS
+    return {
+        # What the dictionary cursor does for every row
+        "dict": lambda raw: dict(zip(names, raw)),
+        "record": lambda raw: rows_module.UserRecord(*raw),
+        "tuple": lambda raw: rows_module.UserTuple(*raw),
+    }
+
+
+def main(count=100000):
+    """
+    Prints bytes per row and rows/sec for each row type
+    """
+    raw_rows = bench_columnar.synthetic_rows(count)
+    print(f"rows: {count}")
+    for label, build in builders().items():
+        # Every mode pays for fresh values, as the driver creates them
+        fresh = [tuple(map(bench_columnar.copy_value, raw))
+                 for raw in raw_rows]
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        built = [build(raw) for raw in fresh]
+        overhead = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for raw in fresh:
+            build(raw)
+        elapsed = time.perf_counter() - start
+
+        print(f"{label:>7}: {overhead / count:7.1f} bytes/row of overhead, "
+              f"{count / elapsed:12.0f} rows/sec")
+        del built
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""
+Memory profile of 0-stream_users.stream_users
+
+Streams the whole user_data table in a fresh process for each cursor mode
+and reports time-to-first-row and peak RSS growth, after half of the table
+and after all of it. With the unbuffered mode the peak stays flat as more
+rows go by; the buffered mode grows with the size of the result set.
+
+Exits 1 if the unbuffered peak grows by more than `slack_kb` over the
+second half of the table, or if no rows were streamed.
+
+Usage: ./bench_stream_memory.py [chunk_size] [slack_kb]
+"""
+import multiprocessing
+import resource
+import sys
+import time
+
+
+def peak_rss_kb():
+    """
+    Returns the peak resident set size of this process in kilobytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def count_rows():
+    """
+    Returns the number of rows in user_data (0 if the database is down)
+    """
+    seed = __import__('seed')
+    connection = seed.connect_to_prodev()
+    if not connection:
+        return 0
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM user_data")
+        count = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        connection.close()
+    return count
+
+
+def profile_stream(buffered, chunk_size, results):
+    """
+    Streams every row once and records the measurements in `results`
+    """
+    stream_users = __import__('0-stream_users').stream_users
+    halfway = count_rows() // 2
+
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    first_row = None
+    half_growth = 0
+    rows = 0
+    for _ in stream_users(chunk_size=chunk_size, buffered=buffered):
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows += 1
+        if rows == halfway:
+            half_growth = peak_rss_kb() - baseline
+
+    results.update({
+        "rows": rows,
+        "first_row_ms": (first_row or 0.0) * 1000,
+        "total_s": time.perf_counter() - start,
+        "half_rss_growth_kb": half_growth,
+        "rss_growth_kb": peak_rss_kb() - baseline,
+    })
+
+
+def main(chunk_size=1000, slack_kb=1024):
+    """
+    Profiles the buffered and unbuffered cursor modes side by side
+    Returns: 0 if the unbuffered peak stayed flat, 1 otherwise
+    """
+    reports = {}
+    with multiprocessing.Manager() as manager:
+        for buffered in (False, True):
+            results = manager.dict()
+            worker = multiprocessing.Process(
+                target=profile_stream, args=(buffered, chunk_size, results)
+            )
+            worker.start()
+            worker.join()
+            reports[buffered] = dict(results)
+            mode = "buffered" if buffered else "unbuffered"
+            print(f"{mode:>10}: {results.get('rows', 0)} rows, "
+                  f"first row {results.get('first_row_ms', 0):.2f} ms, "
+                  f"total {results.get('total_s', 0):.2f} s, "
+                  f"peak RSS +{results.get('half_rss_growth_kb', 0)} KB "
+                  f"at half, +{results.get('rss_growth_kb', 0)} KB at end")
+
+    unbuffered = reports[False]
+    if not unbuffered.get("rows"):
+        print("FAIL: no rows were streamed", file=sys.stderr)
+        return 1
+    second_half = unbuffered["rss_growth_kb"] - unbuffered["half_rss_growth_kb"]
+    if second_half > slack_kb:
+        print(f"FAIL: unbuffered peak RSS grew {second_half} KB over the "
+              f"second half of the table (limit {slack_kb} KB)",
+              file=sys.stderr)
+        return 1
+    print(f"OK: unbuffered peak RSS grew {second_half} KB over the second "
+          f"half of the table (limit {slack_kb} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:3])))
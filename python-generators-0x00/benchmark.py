@@ -0,0 +1,405 @@
+#!/usr/bin/python3
+"""
+Throughput and latency benchmark harness for the generators package
+
+Seeds synthetic user_data rows into MySQL (ALX_prodev) or a local SQLite
+stand-in, then runs each access pattern in a fresh process and reports
+rows/sec, time-to-first-row, p50/p99 time per page and peak RSS as JSON.
+With --baseline the run is compared against a stored result and the exit
+status is 1 when any metric regressed beyond the tolerance.
+
+Usage:
+    ./benchmark.py --rows 100000 --backend sqlite
+    ./benchmark.py --rows 100000 --save-baseline baseline.json
+    ./benchmark.py --rows 100000 --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import sqlite3
+import sys
+import time
+import uuid
+seed = __import__('seed')
+
+PATTERNS = ("stream_users", "stream_users_in_batches", "lazy_pagination",
+            "stream_user_ages")
+
+
+class SQLiteCursor:
+    """
+    Minimal cursor with the mysql.connector interface the package uses,
+    over a sqlite3 cursor
+    """
+
+    def __init__(self, connection, dictionary=False):
+        self.cursor = connection.cursor()
+        self.dictionary = dictionary
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self.cursor.description)
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def execute(self, query, params=()):
+        self.cursor.execute(query.replace("%s", "?"), params)
+
+    def executemany(self, query, seq_params):
+        self.cursor.executemany(query.replace("%s", "?"), seq_params)
+
+    def convert(self, rows):
+        if not self.dictionary:
+            return rows
+        names = self.column_names
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        return None if row is None else self.convert([row])[0]
+
+    def fetchmany(self, size=1):
+        return self.convert(self.cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self.convert(self.cursor.fetchall())
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Stand-in for a mysql.connector connection, backed by a SQLite file
+    holding a user_data table
+    """
+
+    unread_result = False
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+    @property
+    def in_transaction(self):
+        return self.connection.in_transaction
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self.connection, dictionary)
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def ping(self, reconnect=False):
+        self.connection.execute("SELECT 1")
+
+    def close(self):
+        self.connection.close()
+
+
+def synthetic_users(count, rng_seed=0):
+    """
+    Generator of (user_id, name, email, age) tuples
+    """
+    rng = random.Random(rng_seed)
+    for i in range(count):
+        yield (str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+               f"User {i}", f"user{i}@example.com", rng.randint(18, 100))
+
+
+def insert_users(connection, count, batch_size=10000):
+    """
+    Inserts `count` synthetic users in committed executemany batches
+    """
+    cursor = connection.cursor()
+    batch = []
+    for user in synthetic_users(count):
+        batch.append(user)
+        if len(batch) == batch_size:
+            cursor.executemany(
+                "INSERT INTO user_data (user_id, name, email, age) "
+                "VALUES (%s, %s, %s, %s)", batch)
+            connection.commit()
+            batch = []
+    if batch:
+        cursor.executemany(
+            "INSERT INTO user_data (user_id, name, email, age) "
+            "VALUES (%s, %s, %s, %s)", batch)
+        connection.commit()
+    cursor.close()
+
+
+def seed_sqlite(path, count):
+    """
+    Creates (or reuses) a SQLite stand-in database holding `count` users
+    """
+    if os.path.exists(path):
+        connection = sqlite3.connect(path)
+        existing = connection.execute(
+            "SELECT COUNT(*) FROM user_data").fetchone()[0]
+        connection.close()
+        if existing == count:
+            return
+        os.remove(path)
+
+    connection = SQLiteConnection(path)
+    connection.connection.execute("""
+        CREATE TABLE user_data (
+            user_id VARCHAR(36) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age DECIMAL NOT NULL
+        )
+    """)
+    connection.connection.execute(
+        "CREATE INDEX idx_user_data_age ON user_data (age)")
+    insert_users(connection, count)
+    connection.close()
+
+
+def seed_mysql(count):
+    """
+    Replaces the contents of ALX_prodev.user_data with `count` users
+    """
+    connection = seed.connect_db()
+    if not connection:
+        raise RuntimeError("Could not connect to MySQL")
+    seed.create_database(connection)
+    connection.close()
+
+    connection = seed.connect_to_prodev()
+    seed.create_table(connection)
+    cursor = connection.cursor()
+    cursor.execute("TRUNCATE TABLE user_data")
+    cursor.close()
+    insert_users(connection, count)
+    age_stats = __import__('age_stats')
+    age_stats.rebuild_age_stats(connection)
+    connection.close()
+
+
+def pattern_pages(pattern, page_size):
+    """
+    Returns an iterator of "pages" (lists of items) for an access pattern;
+    row-at-a-time patterns are grouped into pages of page_size items
+
+    The pattern's module (and what it imports) is loaded here, but the
+    returned generator does no work until it is first advanced.
+    """
+    if pattern == "stream_users":
+        stream = __import__('0-stream_users').stream_users(page_size)
+    elif pattern == "stream_user_ages":
+        stream = __import__('4-stream_ages').stream_user_ages()
+    elif pattern == "stream_users_in_batches":
+        return __import__('1-batch_processing').stream_users_in_batches(
+            page_size)
+    elif pattern == "lazy_pagination":
+        return __import__('2-lazy_paginate').lazy_pagination(page_size)
+    else:
+        raise ValueError(f"Unknown pattern: {pattern!r}")
+    return group(stream, page_size)
+
+
+def group(iterable, size):
+    """
+    Generator that groups items into lists of `size`
+    """
+    page = []
+    for item in iterable:
+        page.append(item)
+        if len(page) == size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def peak_rss_kb():
+    """
+    Returns the peak resident set size of this process in kilobytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(values, pct):
+    """
+    Returns the nearest-rank percentile of `values`
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def run_pattern(pattern, backend, sqlite_path, page_size, results):
+    """
+    Runs one access pattern to completion and stores its metrics in
+    `results`; executed in a fresh child process
+    """
+    if backend == "sqlite":
+        seed.configure_pool(connect=lambda: SQLiteConnection(sqlite_path))
+
+    # Import the pattern before the baseline and the clock, so neither
+    # includes module loading
+    pages = pattern_pages(pattern, page_size)
+
+    baseline_rss = peak_rss_kb()
+    page_times = []
+    rows = 0
+    first_row = None
+    start = last = time.perf_counter()
+    for page in pages:
+        now = time.perf_counter()
+        if first_row is None and page:
+            first_row = now - start
+        page_times.append(now - last)
+        rows += len(page)
+        last = time.perf_counter()
+    elapsed = time.perf_counter() - start
+
+    results[pattern] = {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+        "time_to_first_row_ms": (first_row or 0.0) * 1000,
+        "p50_page_ms": percentile(page_times, 50) * 1000,
+        "p99_page_ms": percentile(page_times, 99) * 1000,
+        "peak_rss_kb": peak_rss_kb(),
+        "rss_growth_kb": peak_rss_kb() - baseline_rss,
+    }
+
+
+def run(patterns, backend, rows, page_size, sqlite_path):
+    """
+    Seeds the data and runs every pattern in its own process
+    Returns: The report dictionary
+    """
+    if backend == "sqlite":
+        seed_sqlite(sqlite_path, rows)
+
+    report = {
+        "backend": backend,
+        "rows": rows,
+        "page_size": page_size,
+        "python": sys.version.split()[0],
+        "results": {},
+    }
+    with multiprocessing.Manager() as manager:
+        results = manager.dict()
+        for pattern in patterns:
+            worker = multiprocessing.Process(
+                target=run_pattern,
+                args=(pattern, backend, sqlite_path, page_size, results)
+            )
+            worker.start()
+            worker.join()
+            if pattern not in results:
+                raise RuntimeError(f"Pattern {pattern} failed")
+        report["results"] = {
+            pattern: dict(results[pattern]) for pattern in patterns
+        }
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compares a report against a baseline report
+
+    Returns:
+        list: Human-readable regression messages (empty if none)
+    """
+    # Metric name -> True when higher is better
+    metrics = {
+        "rows_per_sec": True,
+        "time_to_first_row_ms": False,
+        "p50_page_ms": False,
+        "p99_page_ms": False,
+        "rss_growth_kb": False,
+    }
+    regressions = []
+    for pattern, result in report["results"].items():
+        previous = baseline.get("results", {}).get(pattern)
+        if previous is None:
+            continue
+        for metric, higher_is_better in metrics.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if higher_is_better and new < old * (1 - tolerance):
+                regressions.append(
+                    f"{pattern}.{metric}: {new:.1f} < {old:.1f}")
+            elif not higher_is_better and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{pattern}.{metric}: {new:.1f} > {old:.1f}")
+    return regressions
+
+
+def main(argv=None):
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="synthetic rows to seed (1k to 10M)")
+    parser.add_argument("--backend", choices=("sqlite", "mysql"),
+                        default="sqlite")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--patterns", nargs="+", choices=PATTERNS,
+                        default=list(PATTERNS))
+    parser.add_argument("--sqlite-path", default=None,
+                        help="stand-in database file "
+                             "(default: bench_users_<rows>.db)")
+    parser.add_argument("--seed-mysql", action="store_true",
+                        help="replace ALX_prodev.user_data with synthetic "
+                             "rows before running")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--save-baseline", metavar="FILE")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare against a stored report")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression (default 0.2)")
+    args = parser.parse_args(argv)
+
+    sqlite_path = args.sqlite_path or f"bench_users_{args.rows}.db"
+    if args.backend == "mysql" and args.seed_mysql:
+        seed_mysql(args.rows)
+
+    report = run(args.patterns, args.backend, args.rows, args.page_size,
+                 sqlite_path)
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                file.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
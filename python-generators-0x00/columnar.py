@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+"""
+Columnar batches of user_data rows
+
+A ColumnBatch stores each column contiguously instead of one dictionary
+per row: numeric columns in array('d') buffers, text columns as a single
+UTF-8 byte buffer plus an offsets array (the layout Arrow uses). Filters
+run as vectorized masks over whole columns, with NumPy when it is
+installed and plain list comprehensions otherwise.
+"""
+from array import array
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+predicates = __import__('predicates')
+
+# Column order of user_data and the columns stored as doubles
+USER_COLUMNS = ("user_id", "name", "email", "age")
+NUMERIC_COLUMNS = frozenset(("age",))
+
+
+class StringColumn:
+    """
+    Text column stored as one UTF-8 buffer and an offsets array; value i
+    is data[offsets[i]:offsets[i + 1]]
+
+    `data` and `offsets` may be memoryviews over a larger buffer (e.g. a
+    memory-mapped snapshot); offsets are then absolute positions in it.
+    """
+
+    def __init__(self, data=b"", offsets=None):
+        self.data = data if isinstance(data, memoryview) else bytes(data)
+        self.offsets = offsets if offsets is not None else array('I', [0])
+
+    @classmethod
+    def from_values(cls, values):
+        """Packs an iterable of strings into a column"""
+        data = bytearray()
+        offsets = array('I', [0])
+        for value in values:
+            data += value.encode('utf-8')
+            offsets.append(len(data))
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return str(self.data[start:end], 'utf-8')
+
+    def __iter__(self):
+        data, offsets = self.data, self.offsets
+        for i in range(len(offsets) - 1):
+            yield str(data[offsets[i]:offsets[i + 1]], 'utf-8')
+
+    def take(self, indices):
+        """
+        Returns a new column with the values at `indices`, copying the raw
+        bytes without decoding them
+        """
+        data, offsets = self.data, self.offsets
+        kept = bytearray()
+        kept_offsets = array('I', [0])
+        for i in indices:
+            kept += data[offsets[i]:offsets[i + 1]]
+            kept_offsets.append(len(kept))
+        return StringColumn(kept, kept_offsets)
+
+    def nbytes(self):
+        """Bytes used by the buffers"""
+        offsets = self.offsets
+        return offsets[-1] - offsets[0] + offsets.itemsize * len(offsets)
+
+
+class ColumnBatch:
+    """
+    Batch of rows stored column by column
+
+    Columns are reached with batch['age']; numeric columns are array('d')
+    and text columns are StringColumn. Filtering does not copy the
+    columns: it records a selection vector of the row indices that
+    passed, and compact() materializes it when a dense copy is wanted.
+    """
+
+    def __init__(self, columns, selection=None):
+        self.columns = columns
+        self.selection = selection
+
+    @classmethod
+    def from_rows(cls, rows, names=USER_COLUMNS):
+        """
+        Builds a batch from row tuples whose values are in `names` order
+        """
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        columns = {}
+        for name, column in zip(names, values):
+            if name in NUMERIC_COLUMNS:
+                columns[name] = array('d', map(float, column))
+            else:
+                columns[name] = StringColumn.from_values(column)
+        return cls(columns)
+
+    def __len__(self):
+        if self.selection is not None:
+            return len(self.selection)
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def indices(self):
+        """Row indices visible through the selection vector"""
+        if self.selection is not None:
+            return self.selection
+        for column in self.columns.values():
+            return range(len(column))
+        return range(0)
+
+    def filter(self, mask):
+        """
+        Returns a view of the rows where mask is true, without copying
+        Args:
+            mask: Sequence of booleans (or NumPy bool array) from mask(),
+                one per visible row
+        """
+        if np is not None and isinstance(mask, np.ndarray):
+            positions = np.flatnonzero(mask)
+            if self.selection is not None:
+                positions = np.frombuffer(self.selection, np.uint32)[positions]
+            selection = array('I', positions.astype(np.uint32).tobytes())
+        else:
+            selection = array('I', compress(self.indices(), mask))
+        return ColumnBatch(self.columns, selection)
+
+    def compact(self):
+        """
+        Returns a dense copy holding only the visible rows
+        """
+        if self.selection is None:
+            return self
+        selection = self.selection
+        columns = {}
+        for name, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                columns[name] = column.take(selection)
+            else:
+                columns[name] = array('d', (column[i] for i in selection))
+        return ColumnBatch(columns)
+
+    def rows(self):
+        """
+        Generator that yields the visible rows as dictionaries
+        """
+        names = list(self.columns)
+        columns = [self.columns[name] for name in names]
+        for i in self.indices():
+            yield dict(zip(names, (column[i] for column in columns)))
+
+    def nbytes(self):
+        """Bytes used by the column buffers and the selection vector"""
+        total = 0
+        for column in self.columns.values():
+            if isinstance(column, StringColumn):
+                total += column.nbytes()
+            else:
+                total += column.itemsize * len(column)
+        if self.selection is not None:
+            total += self.selection.itemsize * len(self.selection)
+        return total
+
+
+def column_values(batch, name):
+    """
+    Returns the visible values of a column in the form masks are computed
+    on: a NumPy array for numeric columns when NumPy is available (a
+    zero-copy view when there is no selection), else a sequence
+    """
+    column = batch[name]
+    selection = batch.selection
+    if np is not None and not isinstance(column, StringColumn):
+        values = np.frombuffer(column, dtype=np.float64)
+        if selection is not None:
+            values = values[np.frombuffer(selection, dtype=np.uint32)]
+        return values
+    if selection is not None:
+        return [column[i] for i in selection]
+    return column
+
+
+def mask(batch, predicate):
+    """
+    Evaluates a predicate over a whole batch at once
+
+    Comparisons on numeric columns are a single NumPy operation; other
+    comparisons are one pass over the column. Where() predicates fall back
+    to row-by-row evaluation.
+
+    Returns:
+        NumPy bool array, or list of booleans without NumPy
+    """
+    if isinstance(predicate, predicates.Comparison):
+        values = column_values(batch, predicate.column)
+        test = predicates.OPERATORS[predicate.op]
+        if np is not None and isinstance(values, np.ndarray):
+            return test(values, predicate.value)
+        value = predicate.value
+        return [test(item, value) for item in values]
+
+    if isinstance(predicate, predicates.In):
+        values = column_values(batch, predicate.column)
+        if np is not None and isinstance(values, np.ndarray):
+            return np.isin(values, predicate.values)
+        wanted = set(predicate.values)
+        return [item in wanted for item in values]
+
+    if isinstance(predicate, (predicates.And, predicates.Or)):
+        left = mask(batch, predicate.left)
+        right = mask(batch, predicate.right)
+        both = isinstance(predicate, predicates.And)
+        if np is not None and isinstance(left, np.ndarray) \
+                and isinstance(right, np.ndarray):
+            return left & right if both else left | right
+        if both:
+            return [a and b for a, b in zip(left, right)]
+        return [a or b for a, b in zip(left, right)]
+
+    return [bool(predicate(row)) for row in batch.rows()]
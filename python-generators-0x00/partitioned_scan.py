@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+"""
+Module that scans user_data in parallel by splitting the user_id key
+space into ranges, each streamed on its own connection in a worker
+"""
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Manager
+seed = __import__('seed')
+predicates = __import__('predicates')
+
+# Width of the hex prefix used to cut the user_id key space
+PREFIX_DIGITS = 4
+
+# Seconds a worker waits on a full queue before checking for cancellation
+PUT_TIMEOUT = 0.1
+
+
+def partition_bounds(partitions):
+    """
+    Splits the user_id key space into contiguous ranges
+
+    user_id values are UUID strings, so their leading hex digits are
+    evenly distributed and cutting on hex prefixes gives ranges of about
+    the same size. The first and last ranges are open-ended so that no
+    key is ever missed.
+
+    Args:
+        partitions (int): Number of ranges
+
+    Returns:
+        list: (lower, upper) pairs; lower is inclusive, upper exclusive,
+        None means unbounded
+    """
+    space = 16 ** PREFIX_DIGITS
+    cuts = [
+        format(space * i // partitions, f"0{PREFIX_DIGITS}x")
+        for i in range(1, partitions)
+    ]
+    bounds = [None] + cuts + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def range_predicate(lower, upper, where=None):
+    """
+    Returns the predicate selecting one partition, ANDed with `where`
+    """
+    user_id = predicates.col('user_id')
+    predicate = where
+    if lower is not None:
+        predicate = predicates.combine(predicate, user_id >= lower)
+    if upper is not None:
+        predicate = predicates.combine(predicate, user_id < upper)
+    return predicate
+
+
+def put(sink, item, stop):
+    """
+    Puts an item on a bounded queue, giving up once `stop` is set
+
+    Returns:
+        bool: True if the item was queued
+    """
+    while not stop.is_set():
+        try:
+            sink.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def scan_partition(index, lower, upper, page_size, where, transform,
+                   sink, stop):
+    """
+    Streams one key range on its own connection into `sink`
+
+    Every message is a (kind, index, payload) tuple where kind is "page",
+    "error" or "done". Runs in a worker thread or process.
+    """
+    connection = seed.connect_to_prodev()
+    try:
+        if not connection:
+            raise RuntimeError(f"Partition {index} could not connect")
+        for page in seed.paginate_by_key(
+                connection, "user_data", page_size,
+                where=range_predicate(lower, upper, where)):
+            payload = transform(page) if transform else page
+            if not put(sink, ("page", index, payload), stop):
+                return
+    except Exception as err:
+        # Re-wrap so the error always pickles across process boundaries
+        error = RuntimeError(
+            f"Partition {index}: {type(err).__name__}: {err}"
+        )
+        put(sink, ("error", index, error), stop)
+    finally:
+        if connection:
+            connection.close()
+        put(sink, ("done", index, None), stop)
+
+
+def scan_partitioned(partitions=4, page_size=1000, where=None, transform=None,
+                     ordered=False, executor="thread", queue_size=8):
+    """
+    Generator function that scans user_data in parallel partitions
+
+    Args:
+        partitions (int): Number of key ranges, each on its own connection
+        page_size (int): Rows fetched per keyset page in each partition
+        where (Predicate): Optional filter applied in every partition
+        transform (callable): Optional function applied to each page in the
+            worker, e.g. to filter or reduce it where the CPU work runs in
+            parallel; must be a module-level function with "process"
+        ordered (bool): Yield partitions in user_id order instead of as soon
+            as any page is ready
+        executor (str): "thread" or "process"
+        queue_size (int): Pages buffered per partition (ordered) or in total
+            (unordered) before workers block
+
+    Yields:
+        Each page (or transformed page) as it is merged from the workers
+    """
+    bounds = partition_bounds(partitions)
+    manager = Manager() if executor == "process" else None
+    make_queue = manager.Queue if manager else queue.Queue
+    stop = manager.Event() if manager else threading.Event()
+    pool_class = ProcessPoolExecutor if manager else ThreadPoolExecutor
+
+    if ordered:
+        sinks = [make_queue(queue_size) for _ in bounds]
+    else:
+        sinks = [make_queue(queue_size)] * len(bounds)
+
+    pool = pool_class(max_workers=partitions)
+    try:
+        for index, (lower, upper) in enumerate(bounds):
+            pool.submit(scan_partition, index, lower, upper, page_size,
+                        where, transform, sinks[index], stop)
+
+        if ordered:
+            # Drain each partition in key order; later partitions keep
+            # working ahead until their own queue is full
+            for sink in sinks:
+                yield from drain(sink, 1)
+        else:
+            yield from drain(sinks[0], len(bounds))
+    finally:
+        # Also runs when the consumer stops early
+        stop.set()
+        pool.shutdown(wait=True)
+        if manager:
+            manager.shutdown()
+
+
+def drain(sink, producers):
+    """
+    Yields page payloads from `sink` until `producers` workers are done
+    """
+    remaining = producers
+    while remaining:
+        kind, index, payload = sink.get()
+        if kind == "page":
+            yield payload
+        elif kind == "error":
+            raise payload
+        else:
+            remaining -= 1
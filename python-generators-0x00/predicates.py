@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+"""
+Small filter-expression API for the user_data generators
+
+Predicates are built from columns, e.g. `col('age') > 25`, and combined
+with `&` and `|`. Each one either compiles into a parameterized SQL WHERE
+clause, so the server does the filtering, or is evaluated in Python on
+the rows that come back when it cannot be pushed down.
+"""
+import operator
+import re
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# SQL operator -> Python function used for fallback evaluation
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class Predicate:
+    """Base class for filter expressions"""
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def to_sql(self):
+        """
+        Compiles the predicate into a parameterized WHERE clause
+
+        Returns:
+            tuple: (clause, params), or None if it cannot be pushed down
+        """
+        return None
+
+    def __call__(self, row):
+        """
+        Evaluates the predicate against a row dictionary in Python
+        """
+        raise NotImplementedError
+
+
+class Column:
+    """Column reference used to build comparisons"""
+
+    def __init__(self, name):
+        if not IDENTIFIER.match(name):
+            raise ValueError(f"Invalid column name: {name!r}")
+        self.name = name
+
+    def __eq__(self, value):
+        return Comparison(self.name, "=", value)
+
+    def __ne__(self, value):
+        return Comparison(self.name, "!=", value)
+
+    def __lt__(self, value):
+        return Comparison(self.name, "<", value)
+
+    def __le__(self, value):
+        return Comparison(self.name, "<=", value)
+
+    def __gt__(self, value):
+        return Comparison(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Comparison(self.name, ">=", value)
+
+    def isin(self, values):
+        return In(self.name, values)
+
+    __hash__ = None
+
+
+class Comparison(Predicate):
+    """`column <op> value`"""
+
+    def __init__(self, column, op, value):
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def to_sql(self):
+        return f"{self.column} {self.op} %s", (self.value,)
+
+    def __call__(self, row):
+        return OPERATORS[self.op](row[self.column], self.value)
+
+    def __repr__(self):
+        return f"col({self.column!r}) {self.op} {self.value!r}"
+
+
+class In(Predicate):
+    """`column IN (values...)`"""
+
+    def __init__(self, column, values):
+        self.column = column
+        self.values = tuple(values)
+
+    def to_sql(self):
+        if not self.values:
+            return "1 = 0", ()
+        placeholders = ", ".join(["%s"] * len(self.values))
+        return f"{self.column} IN ({placeholders})", self.values
+
+    def __call__(self, row):
+        return row[self.column] in self.values
+
+    def __repr__(self):
+        return f"col({self.column!r}).isin({list(self.values)!r})"
+
+
+class Where(Predicate):
+    """Arbitrary Python test on a row; always evaluated client-side"""
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, row):
+        return bool(self.function(row))
+
+    def __repr__(self):
+        return f"Where({self.function!r})"
+
+
+class And(Predicate):
+    """Conjunction of two predicates"""
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def to_sql(self):
+        left, right = self.left.to_sql(), self.right.to_sql()
+        if left is None or right is None:
+            return None
+        return f"({left[0]}) AND ({right[0]})", left[1] + right[1]
+
+    def __call__(self, row):
+        return self.left(row) and self.right(row)
+
+    def __repr__(self):
+        return f"({self.left!r}) & ({self.right!r})"
+
+
+class Or(Predicate):
+    """Disjunction of two predicates"""
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def to_sql(self):
+        left, right = self.left.to_sql(), self.right.to_sql()
+        if left is None or right is None:
+            return None
+        return f"({left[0]}) OR ({right[0]})", left[1] + right[1]
+
+    def __call__(self, row):
+        return self.left(row) or self.right(row)
+
+    def __repr__(self):
+        return f"({self.left!r}) | ({self.right!r})"
+
+
+def col(name):
+    """
+    Returns a column reference for building predicates, e.g. col('age') > 25
+    """
+    return Column(name)
+
+
+def split_predicate(predicate):
+    """
+    Splits a predicate into the part the server can evaluate and the part
+    that has to run in Python
+
+    Conjunctions are split term by term, so `(col('age') > 25) & Where(f)`
+    still pushes the age filter down and only runs `f` client-side.
+
+    Returns:
+        tuple: (pushdown, residual), either of which may be None
+    """
+    if predicate is None:
+        return None, None
+    if isinstance(predicate, And):
+        left_push, left_rest = split_predicate(predicate.left)
+        right_push, right_rest = split_predicate(predicate.right)
+        return combine(left_push, right_push), combine(left_rest, right_rest)
+    if predicate.to_sql() is not None:
+        return predicate, None
+    return None, predicate
+
+
+def combine(left, right):
+    """
+    ANDs two optional predicates together
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return And(left, right)
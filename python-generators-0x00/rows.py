@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Compact row types for streamed users
+
+The streamers yield dictionaries by default, which carry a hash table per
+row. The factories here build rows without one: UserRecord keeps its
+fields in __slots__ and UserTuple is a named tuple. The field names live
+once on the class, and both still allow row['age'] style access, so code
+written against dictionaries keeps working.
+"""
+from collections import namedtuple
+
+USER_COLUMNS = ("user_id", "name", "email", "age")
+
+
+class UserRecord:
+    """Mutable user row stored in __slots__"""
+
+    __slots__ = USER_COLUMNS
+
+    def __init__(self, user_id, name, email, age):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"UserRecord(user_id={self.user_id!r}, name={self.name!r}, "
+                f"email={self.email!r}, age={self.age!r})")
+
+    def astuple(self):
+        """Returns the fields as a tuple in column order"""
+        return (self.user_id, self.name, self.email, self.age)
+
+    def asdict(self):
+        """Returns the fields as a dictionary"""
+        return dict(zip(USER_COLUMNS, self.astuple()))
+
+
+class UserTuple(namedtuple("UserTuple", USER_COLUMNS)):
+    """Immutable user row; also indexable by column name"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def asdict(self):
+        """Returns the fields as a dictionary"""
+        return self._asdict()
+
+
+# Names accepted wherever a row_factory can be passed
+ROW_FACTORIES = {
+    "record": UserRecord,
+    "tuple": UserTuple,
+}
+
+
+def resolve(row_factory):
+    """
+    Returns the row class for a factory name or class (None means dicts)
+    """
+    if isinstance(row_factory, str):
+        try:
+            return ROW_FACTORIES[row_factory]
+        except KeyError:
+            raise ValueError(
+                f"Unknown row factory: {row_factory!r}"
+            ) from None
+    return row_factory
@@ -3,10 +3,17 @@
 Seed script for setting up MySQL database with user data
 and streaming rows using generators
 """
+import collections
 import csv
 import mysql.connector
+import operator
+import queue
 import uuid
 import os
+import threading
+import time
+predicates = __import__('predicates')
+age_stats = __import__('age_stats')
 
 
 def connect_db():
@@ -41,19 +48,296 @@ def create_database(connection):
         print(f"Error creating database: {err}")
 
 
-def connect_to_prodev():
+def open_prodev_connection(**options):
+    """
+    Opens a new, unpooled connection to the ALX_prodev database
+    Args:
+        options: Extra connection options, e.g. allow_local_infile=True
+    Returns: MySQL connection object
+    Raises: mysql.connector.Error if the connection fails
+    """
+    return mysql.connector.connect(
+        host="localhost",
+        user="root",
+        password="",
+        database="ALX_prodev",
+        **options
+    )
+
+
+class PoolExhaustedError(mysql.connector.Error):
+    """Raised when no pooled connection frees up within the timeout"""
+
+
+class PooledConnection:
+    """
+    Connection borrowed from a ConnectionPool
+
+    Behaves like the underlying MySQL connection, except that close()
+    hands it back to the pool instead of closing the socket, so existing
+    `connection.close()` calls keep working unchanged.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise mysql.connector.InterfaceError("Connection returned to pool")
+        return getattr(self._connection, name)
+
+    def close(self):
+        """Returns the connection to the pool; safe to call twice"""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._pool.release(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of connections to ALX_prodev
+
+    Args:
+        connect: Function that opens a new connection
+        min_size: Connections kept open even when idle
+        max_size: Upper bound on open connections
+        idle_timeout: Seconds an idle connection above min_size is kept
+        health_check_interval: Connections idle longer than this are pinged
+            before being handed out
+        acquire_timeout: Seconds to wait for a free connection when the
+            pool is at max_size (None waits forever)
+    """
+
+    def __init__(self, connect=open_prodev_connection, min_size=1,
+                 max_size=10, idle_timeout=300, health_check_interval=30,
+                 acquire_timeout=30):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.idle = collections.deque()  # (connection, last_used) pairs
+        self.size = 0
+        self.in_use = 0
+        self.condition = threading.Condition()
+        self.metrics = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "peak_in_use": 0,
+        }
+
+    def acquire(self, timeout=None):
+        """
+        Borrows a connection, opening one if none is idle and the pool
+        is below max_size, otherwise waiting for one to be released
+        Returns: PooledConnection
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+
+        with self.condition:
+            while True:
+                self.prune_idle()
+                if self.idle:
+                    connection, last_used = self.idle.pop()
+                    break
+                if self.size < self.max_size:
+                    # Reserve the slot, then connect outside the lock
+                    self.size += 1
+                    connection = None
+                    break
+
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            f"No connection available after {timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                waited = True
+                self.condition.wait(remaining)
+
+            self.in_use += 1
+            self.metrics["checkouts"] += 1
+            self.metrics["peak_in_use"] = max(
+                self.metrics["peak_in_use"], self.in_use
+            )
+            if waited:
+                wait = time.monotonic() - started
+                self.metrics["waits"] += 1
+                self.metrics["wait_seconds"] += wait
+                self.metrics["max_wait_seconds"] = max(
+                    self.metrics["max_wait_seconds"], wait
+                )
+
+        try:
+            if connection is None:
+                connection = self.open()
+            elif time.monotonic() - last_used > self.health_check_interval:
+                connection = self.check_health(connection)
+        except Exception:
+            with self.condition:
+                self.in_use -= 1
+                self.size -= 1
+                self.condition.notify()
+            raise
+        return PooledConnection(self, connection)
+
+    def open(self):
+        """Opens a new connection for the pool"""
+        connection = self.connect()
+        with self.condition:
+            self.metrics["created"] += 1
+        return connection
+
+    def check_health(self, connection):
+        """Pings a connection and replaces it if the server dropped it"""
+        try:
+            connection.ping(reconnect=False)
+            return connection
+        except mysql.connector.Error:
+            with self.condition:
+                self.metrics["health_check_failures"] += 1
+                self.metrics["discarded"] += 1
+            self.close_quietly(connection)
+            return self.open()
+
+    def release(self, connection):
+        """
+        Takes a connection back; it is rolled back to a clean state, or
+        discarded if it still has an unread result set (e.g. a stream
+        that was abandoned part way)
+        """
+        reusable = True
+        try:
+            if getattr(connection, "unread_result", False):
+                reusable = False
+            elif getattr(connection, "in_transaction", False):
+                connection.rollback()
+        except mysql.connector.Error:
+            reusable = False
+
+        with self.condition:
+            self.in_use -= 1
+            if reusable:
+                self.idle.append((connection, time.monotonic()))
+            else:
+                self.size -= 1
+                self.metrics["discarded"] += 1
+            self.condition.notify()
+
+        if not reusable:
+            self.close_quietly(connection)
+
+    def prune_idle(self):
+        """
+        Closes connections idle for longer than idle_timeout, keeping at
+        least min_size open; called with the lock held
+        """
+        now = time.monotonic()
+        # The oldest idle connections sit at the left of the deque
+        while (self.idle and self.size > self.min_size
+               and now - self.idle[0][1] > self.idle_timeout):
+            connection, _ = self.idle.popleft()
+            self.size -= 1
+            self.metrics["discarded"] += 1
+            self.close_quietly(connection)
+
+    def close_all(self):
+        """Closes every idle connection"""
+        with self.condition:
+            while self.idle:
+                connection, _ = self.idle.pop()
+                self.size -= 1
+                self.close_quietly(connection)
+
+    @staticmethod
+    def close_quietly(connection):
+        """Closes a connection, ignoring errors from dead sockets"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """
+        Returns checkout metrics and current pool occupancy
+        """
+        with self.condition:
+            return dict(
+                self.metrics,
+                size=self.size,
+                in_use=self.in_use,
+                idle=len(self.idle),
+            )
+
+
+# Process-wide pool; recreated in child processes, which must not share
+# sockets with their parent
+pool = None
+pool_pid = None
+pool_lock = threading.Lock()
+
+
+def configure_pool(**options):
+    """
+    Replaces the process-wide pool with one built from `options`
+    (see ConnectionPool for the accepted arguments)
+    Returns: The new ConnectionPool
+    """
+    global pool, pool_pid
+    with pool_lock:
+        if pool is not None and pool_pid == os.getpid():
+            pool.close_all()
+        pool = ConnectionPool(**options)
+        pool_pid = os.getpid()
+        return pool
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use
+    """
+    global pool, pool_pid
+    with pool_lock:
+        if pool is None or pool_pid != os.getpid():
+            pool = ConnectionPool()
+            pool_pid = os.getpid()
+        return pool
+
+
+def connect_to_prodev(**options):
     """
     Connects to the ALX_prodev database in MySQL
+
+    Connections are borrowed from the process-wide pool; calling close()
+    on them returns them to the pool. Passing extra options opens a
+    dedicated, unpooled connection instead.
+
+    Args:
+        options: Extra connection options, e.g. allow_local_infile=True
     Returns: MySQL connection object or None if connection fails
     """
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="ALX_prodev"
-        )
-        return connection
+        if options:
+            return open_prodev_connection(**options)
+        return get_pool().acquire()
     except mysql.connector.Error as err:
         print(f"Error connecting to ALX_prodev: {err}")
         return None
@@ -78,97 +362,382 @@ def create_table(connection):
         """)
         connection.commit()
         cursor.close()
+        ensure_index(connection, "user_data", "age")
+        age_stats.create_stats_tables(connection)
         print("Table user_data created successfully")
     except mysql.connector.Error as err:
         print(f"Error creating table: {err}")
 
 
-def insert_data(connection, csv_file):
+def ensure_index(connection, table_name, column):
+    """
+    Creates an index on a column if no index starts with it yet
+    Args:
+        connection: MySQL connection object
+        table_name: Name of the table
+        column: Column that filters are pushed down on
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s
+            AND column_name = %s AND seq_in_index = 1
+        """, (table_name, column))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(
+                f"CREATE INDEX idx_{table_name}_{column} "
+                f"ON {table_name} ({column})"
+            )
+            connection.commit()
+            print(f"Index on {table_name}.{column} created successfully")
+        cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Error creating index: {err}")
+
+
+def read_csv_batches(csv_path, batch_size, skip=0):
+    """
+    Generator function that streams the user CSV file in batches
+    without ever holding the whole file in memory
+
+    Args:
+        csv_path: Path to the CSV file containing user data
+        batch_size: Number of rows in each batch
+        skip: Number of data lines to skip (already loaded)
+
+    Yields:
+        Tuple (position, batch) where position is the number of data
+        lines consumed so far and batch is a list of row tuples
+    """
+    with open(csv_path, 'r', newline='') as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader, None)  # Skip header row
+
+        source = os.path.basename(csv_path)
+        position = 0
+        batch = []
+        for row in csv_reader:
+            position += 1
+            if position <= skip:
+                continue
+
+            # Check if we have enough columns
+            if len(row) >= 4:
+                # Use provided UUID or derive one from the file and line,
+                # so a resumed load regenerates the same id for a replayed row
+                user_id = row[0]
+                if len(user_id) != 36:
+                    user_id = str(uuid.uuid5(
+                        uuid.NAMESPACE_URL, f"{source}:{position}"
+                    ))
+                batch.append((user_id, row[1], row[2], row[3]))
+
+            if len(batch) >= batch_size:
+                yield position, batch
+                batch = []
+
+        if batch:
+            yield position, batch
+
+
+def read_checkpoint(checkpoint_path):
+    """
+    Reads the number of CSV data lines committed by an interrupted load
+    Returns: int, or None if there is no checkpoint
+    """
+    try:
+        with open(checkpoint_path, 'r') as file:
+            return int(file.read().strip() or 0)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(checkpoint_path, position):
+    """
+    Atomically records the number of CSV data lines committed so far
+    """
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        file.write(str(position))
+    os.replace(tmp_path, checkpoint_path)
+
+
+def load_data_infile(connection, csv_path):
+    """
+    Loads the CSV file with a single LOAD DATA LOCAL INFILE statement
+    The connection must be opened with allow_local_infile=True
+    Args:
+        connection: MySQL connection object
+        csv_path: Path to the CSV file containing user data
+    Returns: Number of rows loaded
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        LOAD DATA LOCAL INFILE %s INTO TABLE user_data
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        (@user_id, name, email, age)
+        SET user_id = IF(CHAR_LENGTH(@user_id) = 36, @user_id, UUID())
+    """, (csv_path,))
+    rows = cursor.rowcount
+    connection.commit()
+    cursor.close()
+    return rows
+
+
+def insert_data(connection, csv_file, batch_size=1000, local_infile=False):
     """
     Inserts data in the database if it does not exist
+
+    Rows are streamed from the CSV and written with one executemany per
+    batch, committing after each batch. The number of committed CSV lines
+    is recorded in a checkpoint file next to the CSV, so a load that fails
+    part way resumes from the last committed batch on the next call.
+    The age aggregates (see age_stats) are updated in the same transaction
+    as each batch.
+
     Args:
         connection: MySQL connection object
         csv_file: Path to the CSV file containing user data
+        batch_size: Number of rows written per executemany/commit
+        local_infile: Try LOAD DATA LOCAL INFILE first (the connection
+            must allow local infile); falls back to batched inserts
     """
+    # Get absolute path to the CSV file
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = os.path.join(script_dir, csv_file)
+    checkpoint_path = csv_path + ".checkpoint"
+
     try:
         cursor = connection.cursor()
-        
+
         # Check if data already exists
         cursor.execute("SELECT COUNT(*) FROM user_data")
         count = cursor.fetchone()[0]
-        
-        if count > 0:
+
+        # Only a checkpoint left by an interrupted load lets us continue
+        # into a table that already has rows
+        skip = read_checkpoint(checkpoint_path)
+        if count > 0 and skip is None:
             print(f"Data already exists in the table. Skipping insertion.")
             cursor.close()
             return
-        
-        # Get absolute path to the CSV file
-        import os
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        csv_path = os.path.join(script_dir, csv_file)
-        
-        # Read data from CSV and insert into the table
-        with open(csv_path, 'r') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip header row
-            
-            for row in csv_reader:
-                # Check if we have enough columns
-                if len(row) >= 4:
-                    # Use provided UUID or generate a new one
-                    user_id = row[0] if len(row[0]) == 36 else str(uuid.uuid4())
-                    name = row[1]
-                    email = row[2]
-                    age = row[3]
-                    
-                    cursor.execute(
-                        "INSERT INTO user_data (user_id, name, email, age) VALUES (%s, %s, %s, %s)",
-                        (user_id, name, email, age)
-                    )
-        
-        connection.commit()
+        # A checkpoint against an empty table is stale
+        skip = skip if count > 0 else 0
+
+        age_stats.create_stats_tables(connection)
+        start = time.perf_counter()
+        inserted = 0
+        # Set when the aggregates can no longer be updated batch by batch
+        rebuild_stats = False
+
+        if local_infile and skip == 0:
+            try:
+                inserted = load_data_infile(connection, csv_path)
+                rebuild_stats = True
+            except mysql.connector.Error as err:
+                print(f"LOAD DATA failed, falling back to batched inserts: {err}")
+                connection.rollback()
+
+        if not inserted:
+            if skip:
+                print(f"Resuming insertion after {skip} committed rows")
+
+            for position, batch in read_csv_batches(csv_path, batch_size, skip):
+                # IGNORE covers a crash between a commit and its checkpoint,
+                # where the same batch is replayed on resume
+                cursor.executemany(
+                    "INSERT IGNORE INTO user_data (user_id, name, email, age) "
+                    "VALUES (%s, %s, %s, %s)",
+                    batch
+                )
+                if cursor.rowcount == len(batch):
+                    age_stats.record_inserted(cursor, batch)
+                else:
+                    # Some rows were replayed from before a crash; which
+                    # ones is unknown, so recount once the load is done
+                    rebuild_stats = True
+                connection.commit()
+                write_checkpoint(checkpoint_path, position)
+                inserted += len(batch)
+
         cursor.close()
-        print(f"Data from {csv_path} inserted successfully")
+        if rebuild_stats:
+            age_stats.rebuild_age_stats(connection)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        elapsed = time.perf_counter() - start
+        rate = inserted / elapsed if elapsed > 0 else 0
+        print(f"Data from {csv_path} inserted successfully "
+              f"({inserted} rows in {elapsed:.2f}s, {rate:.0f} rows/sec)")
     except FileNotFoundError:
         print(f"Error: CSV file {csv_path} not found")
     except mysql.connector.Error as err:
         print(f"Error inserting data: {err}")
 
 
-def stream_rows(connection, table_name, batch_size=5):
+def paginate_by_key(connection, table_name, page_size, key="user_id",
+                    after=None, where=None, columns=None):
     """
-    Generator function that streams rows from a database table one by one
-    
+    Generator function that walks a table in key order using keyset
+    (seek) pagination instead of LIMIT/OFFSET
+
+    Every page is fetched with `WHERE key > last_seen ORDER BY key LIMIT n`,
+    so the server seeks straight to the start of the page through the
+    primary key index and page N costs the same as page 1.
+
     Args:
         connection: MySQL connection object
-        table_name: Name of the table to stream data from
-        batch_size: Number of rows to fetch at a time (default: 5)
-        
+        table_name: Name of the table to page through
+        page_size: Number of rows to fetch in each page
+        key: Unique, indexed column to seek on (default: user_id)
+        after: Key value to resume after (default: start of the table)
+        where: Optional predicate from the predicates module; the parts
+            that compile to SQL are pushed into the WHERE clause and the
+            rest is applied to each page in Python
+        columns: Optional sequence of column names (must include key); when
+            given, rows are plain tuples in that order instead of dicts
+
     Yields:
-        One row at a time from the database
+        List of dictionaries (or tuples), one page of rows at a time
     """
+    pushdown, residual = predicates.split_predicate(where)
+    filters, filter_params = [], ()
+    if pushdown is not None:
+        clause, filter_params = pushdown.to_sql()
+        filters.append(f"({clause})")
+
+    if columns is None:
+        select, key_of = "*", operator.itemgetter(key)
+        matches = residual
+    else:
+        select, position = ", ".join(columns), list(columns).index(key)
+        key_of = operator.itemgetter(position)
+        matches = residual and (
+            lambda row: residual(dict(zip(columns, row)))
+        )
+
+    cursor = connection.cursor(dictionary=columns is None)
     try:
-        cursor = connection.cursor(dictionary=True)
-        offset = 0
-        
+        last_key = after
+
         while True:
-            # Fetch a batch of rows
-            query = f"SELECT * FROM {table_name} LIMIT {batch_size} OFFSET {offset}"
-            cursor.execute(query)
+            conditions, params = list(filters), filter_params
+            if last_key is not None:
+                conditions.append(f"{key} > %s")
+                params += (last_key,)
+            where_clause = (
+                f"WHERE {' AND '.join(conditions)} " if conditions else ""
+            )
+            cursor.execute(
+                f"SELECT {select} FROM {table_name} {where_clause}"
+                f"ORDER BY {key} LIMIT %s",
+                params + (page_size,)
+            )
             rows = cursor.fetchall()
-            
+
             # If no more rows, stop iteration
             if not rows:
                 break
-                
-            # Yield each row one by one
-            for row in rows:
-                yield row
-                
-            # Update offset for next batch
-            offset += batch_size
-            
+
+            page = rows if matches is None else [
+                row for row in rows if matches(row)
+            ]
+            if page:
+                yield page
+
+            # A short page means the end of the table has been reached
+            if len(rows) < page_size:
+                break
+
+            # Remember where this page ended so the next one can seek past it
+            last_key = key_of(rows[-1])
+    finally:
         cursor.close()
+
+
+def read_ahead(iterable, depth, poll_interval=0.1):
+    """
+    Generator function that consumes `iterable` on a background thread,
+    keeping up to `depth` items buffered ahead of the consumer
+
+    The producer blocks once the buffer is full (backpressure) and stops
+    as soon as the consumer closes this generator, e.g. when islice stops
+    early. Exceptions raised by the producer are re-raised here.
+
+    Args:
+        iterable: Source to consume, e.g. a page generator
+        depth: Maximum number of items in flight
+        poll_interval: Seconds the producer waits on a full buffer before
+            checking for cancellation
+
+    Yields:
+        The items of `iterable`, in order
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def offer(item):
+        # Wait for room in the buffer, giving up if the consumer has left
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not offer((item, None)):
+                    break
+        except BaseException as err:
+            offer((done, err))
+            return
+        finally:
+            # Release the source's resources (connections, cursors)
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        offer((done, None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, err = buffer.get()
+            if item is done:
+                if err is not None:
+                    raise err
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def stream_rows(connection, table_name, batch_size=5):
+    """
+    Generator function that streams rows from a database table one by one
+
+    Args:
+        connection: MySQL connection object
+        table_name: Name of the table to stream data from
+        batch_size: Number of rows to fetch at a time (default: 5)
+
+    Yields:
+        One row at a time from the database
+    """
+    try:
+        for page in paginate_by_key(connection, table_name, batch_size):
+            # Yield each row one by one
+            yield from page
     except mysql.connector.Error as err:
         print(f"Error streaming data: {err}")
         yield None
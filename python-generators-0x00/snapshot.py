@@ -0,0 +1,276 @@
+#!/usr/bin/python3
+"""
+Memory-mapped columnar snapshots of user_data
+
+export_snapshot() writes the table to a compact binary file, one
+contiguous section per column:
+
+    header    magic, row count and the (offset, length) of each section
+    user_id   fixed-width 36-byte ASCII values
+    name      uint64 offsets (rows + 1) followed by UTF-8 data
+    email     uint64 offsets (rows + 1) followed by UTF-8 data
+    age       float64 values
+
+Snapshot maps the file and exposes the sections as zero-copy
+memoryviews, with the same generator interface as the database streams,
+so repeated offline scans never go back to MySQL.
+
+Usage: ./snapshot.py export|average PATH
+"""
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+seed = __import__('seed')
+columnar = __import__('columnar')
+
+MAGIC = b"USRSNAP1"
+USER_ID_WIDTH = 36
+SECTIONS = ("user_id", "name_offsets", "name_data",
+            "email_offsets", "email_data", "age")
+# Magic, row count, then (offset, length) for each section
+HEADER = struct.Struct("<8sQ" + "QQ" * len(SECTIONS))
+ALIGNMENT = 8
+
+
+def export_snapshot(path, page_size=10000):
+    """
+    Streams user_data into a snapshot file at `path`
+
+    Each column is spilled to its own temporary file while the table is
+    read with keyset pagination, then the sections are stitched together
+    behind the header, so memory use stays bounded by one page. The file
+    is written next to `path` and moved into place when complete.
+
+    Args:
+        path (str): Snapshot file to create or replace
+        page_size (int): Rows fetched per page
+
+    Returns:
+        int: Number of rows written
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("Snapshots are written little-endian only")
+
+    spills = {name: tempfile.TemporaryFile() for name in SECTIONS}
+    try:
+        name_offset = email_offset = 0
+        spills["name_offsets"].write(struct.pack("<Q", 0))
+        spills["email_offsets"].write(struct.pack("<Q", 0))
+        rows = 0
+
+        connection = seed.connect_to_prodev()
+        if not connection:
+            raise RuntimeError("Could not connect to ALX_prodev")
+        try:
+            for page in seed.paginate_by_key(
+                    connection, "user_data", page_size,
+                    columns=columnar.USER_COLUMNS):
+                user_ids = bytearray()
+                name_offsets, email_offsets = array('Q'), array('Q')
+                names, emails = bytearray(), bytearray()
+                ages = array('d')
+                for user_id, name, email, age in page:
+                    user_ids += user_id.encode('ascii').ljust(
+                        USER_ID_WIDTH, b"\0")
+                    name = name.encode('utf-8')
+                    email = email.encode('utf-8')
+                    names += name
+                    emails += email
+                    name_offset += len(name)
+                    email_offset += len(email)
+                    name_offsets.append(name_offset)
+                    email_offsets.append(email_offset)
+                    ages.append(float(age))
+                spills["user_id"].write(user_ids)
+                spills["name_offsets"].write(name_offsets.tobytes())
+                spills["name_data"].write(names)
+                spills["email_offsets"].write(email_offsets.tobytes())
+                spills["email_data"].write(emails)
+                spills["age"].write(ages.tobytes())
+                rows += len(page)
+        finally:
+            connection.close()
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(b"\0" * HEADER.size)
+            layout = []
+            for name in SECTIONS:
+                # Align every section so numeric views can be cast in place
+                out.write(b"\0" * (-out.tell() % ALIGNMENT))
+                offset = out.tell()
+                spill = spills[name]
+                spill.seek(0)
+                while True:
+                    chunk = spill.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                layout += [offset, out.tell() - offset]
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, rows, *layout))
+        os.replace(tmp_path, path)
+        return rows
+    finally:
+        for spill in spills.values():
+            spill.close()
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file
+
+    Columns are memoryviews straight over the mapped pages: `ages` is
+    cast to float64 and the text columns are StringColumn views, so
+    nothing is copied until a value is actually decoded.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.rows, *self.layout = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a user_data snapshot")
+        self.open_views()
+
+    def open_views(self):
+        """Creates the column views over the mapped file"""
+        self.view = memoryview(self.map)
+        offsets, lengths = self.layout[::2], self.layout[1::2]
+        sections = {
+            name: self.view[offset:offset + length]
+            for name, offset, length in zip(SECTIONS, offsets, lengths)
+        }
+        self.user_ids = sections["user_id"]
+        self.names = columnar.StringColumn(
+            sections["name_data"], sections["name_offsets"].cast("Q"))
+        self.emails = columnar.StringColumn(
+            sections["email_data"], sections["email_offsets"].cast("Q"))
+        self.ages = sections["age"].cast("d")
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """
+        Releases the views and unmaps the file
+
+        While a view handed out by the snapshot is still alive (a batch
+        from iter_batches, a column slice, a NumPy array over `ages`) the
+        file cannot be unmapped: BufferError is raised and the snapshot
+        stays open and usable.
+        """
+        for name in ("user_ids", "names", "emails", "ages", "view"):
+            value = self.__dict__.pop(name, None)
+            if isinstance(value, columnar.StringColumn):
+                value.data.release()
+                value.offsets.release()
+            elif value is not None:
+                value.release()
+        try:
+            self.map.close()
+        except BufferError:
+            self.open_views()
+            raise BufferError(
+                "Snapshot has views still in use; release them before "
+                "closing it"
+            ) from None
+        self.file.close()
+
+    def user_id(self, index):
+        """Returns the user_id of row `index`"""
+        start = index * USER_ID_WIDTH
+        raw = self.user_ids[start:start + USER_ID_WIDTH]
+        return str(raw, 'ascii').rstrip("\0")
+
+    def stream_users(self):
+        """
+        Generator that yields rows one by one as dictionaries, like
+        0-stream_users.stream_users
+        """
+        names, emails, ages = self.names, self.emails, self.ages
+        for index in range(self.rows):
+            yield {
+                "user_id": self.user_id(index),
+                "name": names[index],
+                "email": emails[index],
+                "age": ages[index],
+            }
+
+    def stream_user_ages(self):
+        """
+        Generator that yields ages one by one, like
+        4-stream_ages.stream_user_ages
+        """
+        yield from self.ages
+
+    def iter_batches(self, batch_size):
+        """
+        Generator that yields zero-copy columnar.ColumnBatch views of
+        `batch_size` rows, ready for columnar.mask filters
+        """
+        for start in range(0, self.rows, batch_size):
+            stop = min(start + batch_size, self.rows)
+            user_ids = columnar.StringColumn(
+                self.user_ids,
+                array('Q', range(start * USER_ID_WIDTH,
+                                 stop * USER_ID_WIDTH + 1, USER_ID_WIDTH)))
+            yield columnar.ColumnBatch({
+                "user_id": user_ids,
+                "name": columnar.StringColumn(
+                    self.names.data, self.names.offsets[start:stop + 1]),
+                "email": columnar.StringColumn(
+                    self.emails.data, self.emails.offsets[start:stop + 1]),
+                "age": self.ages[start:stop],
+            })
+
+    def average_age(self):
+        """
+        Returns the average age, summed straight off the mapped pages
+        """
+        if not self.rows:
+            return 0
+        if np is not None:
+            return float(np.frombuffer(self.ages, dtype=np.float64).mean())
+        return math.fsum(self.ages) / self.rows
+
+
+def main(command, path):
+    """
+    Command line entry point: export a snapshot or scan one
+    """
+    if command == "export":
+        print(f"Exported {export_snapshot(path)} rows to {path}")
+    elif command == "average":
+        with Snapshot(path) as snapshot:
+            print(f"Average age of users: {snapshot.average_age():.2f}")
+    else:
+        print(f"Unknown command: {command}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: ./snapshot.py export|average PATH")
+        sys.exit(2)
+    sys.exit(main(sys.argv[1], sys.argv[2]))